@@ -0,0 +1,101 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from recipes.models import Tags
+from .compression import compress_payload, get_compressed_response
+from .constants import CATALOG_CACHE_TIMEOUT
+
+RECIPES_CACHE = 'recipes'
+INGREDIENTS_CACHE = 'ingredients'
+TAGS_CACHE = 'tags'
+RECIPES_PAGE_PARAMS = (
+    'tags', 'search', 'page', 'limit', 'pagination', 'cursor'
+)
+
+
+def get_version(name):
+    """Текущая версия закэшированных данных."""
+
+    return cache.get_or_set(f'version:{name}', time.time_ns, None)
+
+
+def bump_version(*names):
+    """
+    Смена версии закэшированных данных после фиксации транзакции:
+    записи со старой версией больше не читаются.
+    """
+
+    def bump():
+        version = time.time_ns()
+        cache.set_many(
+            {f'version:{name}': version for name in names}, None
+        )
+
+    transaction.on_commit(bump)
+
+
+def get_recipes_page_key(request):
+    """Ключ кэша страницы ленты рецептов для анонимных пользователей."""
+
+    params = '&'.join(
+        f'{param}={value}'
+        for param in RECIPES_PAGE_PARAMS
+        for value in sorted(request.query_params.getlist(param))
+    )
+    digest = hashlib.md5(
+        f'{request.get_host()}?{params}'.encode()
+    ).hexdigest()
+    return f'{RECIPES_CACHE}:{get_version(RECIPES_CACHE)}:{digest}'
+
+
+def get_tag_ids():
+    """Соответствие slug -> id тэгов текущей версии справочника."""
+
+    return cache.get_or_set(
+        f'{TAGS_CACHE}:ids:{get_version(TAGS_CACHE)}',
+        lambda: dict(Tags.objects.values_list('slug', 'id')),
+        CATALOG_CACHE_TIMEOUT
+    )
+
+
+def get_catalog(name, build):
+    """
+    Справочник текущей версии, сериализованный и сжатый один раз.
+    build возвращает тело ответа в байтах. ETag слабый: он общий
+    для несжатого и сжатых представлений.
+    """
+
+    version = get_version(name)
+    cache_key = f'{name}:catalog:{version}'
+    payload = cache.get(cache_key)
+    if payload is None:
+        body = build()
+        payload = {
+            **compress_payload(body),
+            'etag': 'W/' + quote_etag(hashlib.sha256(body).hexdigest()),
+            'last_modified': version // 10 ** 9,
+        }
+        cache.set(cache_key, payload, CATALOG_CACHE_TIMEOUT)
+    return payload
+
+
+def get_catalog_response(request, payload):
+    """Ответ со справочником с поддержкой условных запросов."""
+
+    response = get_conditional_response(
+        request,
+        etag=payload['etag'],
+        last_modified=payload['last_modified'],
+    )
+    if response is None:
+        response = get_compressed_response(request, payload)
+    response['ETag'] = payload['etag']
+    response['Last-Modified'] = http_date(payload['last_modified'])
+    response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,73 @@
+import gzip
+
+import brotli
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .constants import (COMPRESSION_LEVELS, COMPRESSION_MIN_LENGTH,
+                        PRECOMPRESSION_LEVELS)
+
+ENCODINGS = ('br', 'gzip')
+
+
+def compress(body, encoding, levels=COMPRESSION_LEVELS):
+    """Сжатие тела ответа выбранным алгоритмом."""
+
+    if encoding == 'br':
+        return brotli.compress(body, quality=levels['br'])
+    return gzip.compress(body, compresslevel=levels['gzip'])
+
+
+def get_accepted_encoding(request):
+    """
+    Сжатие с наибольшим q из Accept-Encoding или None; порядок
+    ENCODINGS учитывается только при равных q.
+    """
+
+    accepted = {}
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    qualities = {
+        encoding: accepted.get(encoding, accepted.get('*', 0.0))
+        for encoding in ENCODINGS
+    }
+    encoding = max(ENCODINGS, key=lambda encoding: qualities[encoding])
+    return encoding if qualities[encoding] > 0 else None
+
+
+def compress_payload(body):
+    """
+    Тело ответа вместе с заранее сжатыми вариантами для хранения
+    в кэше: сжатие выполняется один раз при заполнении кэша.
+    """
+
+    payload = {'body': body}
+    if len(body) >= COMPRESSION_MIN_LENGTH:
+        for encoding in ENCODINGS:
+            payload[encoding] = compress(
+                body, encoding, PRECOMPRESSION_LEVELS
+            )
+    return payload
+
+
+def get_compressed_response(request, payload,
+                            content_type='application/json'):
+    """Ответ из подготовленного payload в подходящей кодировке."""
+
+    encoding = get_accepted_encoding(request)
+    if encoding in payload:
+        response = HttpResponse(payload[encoding], content_type=content_type)
+        response['Content-Encoding'] = encoding
+    else:
+        response = HttpResponse(payload['body'], content_type=content_type)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -1,3 +1,19 @@
 FIRST_CONSTANT = 150
 SECOND_CONSTANT = 254
 THIRD_CONSTANT = 200
+
+SEARCH_CONFIG = 'russian'
+
+RECIPES_CACHE_TIMEOUT = 60 * 10
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+
+BULK_RECIPES_LIMIT = 100
+
+COOKABLE_MAX_INGREDIENTS = 100
+COOKABLE_MAX_MISSING = 2
+COOKABLE_LIMIT = 10
+COOKABLE_MAX_LIMIT = 50
+
+COMPRESSION_MIN_LENGTH = 1024
+COMPRESSION_LEVELS = {'br': 5, 'gzip': 6}
+PRECOMPRESSION_LEVELS = {'br': 11, 'gzip': 9}
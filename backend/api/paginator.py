@@ -1,4 +1,8 @@
-from rest_framework.pagination import PageNumberPagination
+from datetime import datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
 
 
 class LimitPagination(PageNumberPagination):
@@ -8,3 +12,83 @@ class LimitPagination(PageNumberPagination):
     """
     page_size_query_param = 'limit'
     page_size = 6
+
+
+class LimitCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация с параметром limit: без OFFSET и COUNT(*),
+    время выдачи не зависит от глубины страницы.
+    """
+    page_size_query_param = 'limit'
+    page_size = 6
+    ordering = ('-pub_date', '-id')
+
+
+class UsernameCursorPagination(LimitCursorPagination):
+    ordering = ('username',)
+
+
+class KeysetCursorPagination(LimitCursorPagination):
+    """
+    Курсорная пагинация по ключам (pub_date, id), которые отдает
+    функция выборки: курсор хранит ключ последней записи страницы.
+    Выдача только вперед, ссылка на предыдущую страницу не строится.
+    """
+
+    def paginate_keys(self, get_keys, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        after = None
+        if cursor is not None:
+            try:
+                pub_date, recipe_id = cursor.position.split('|')
+                after = (datetime.fromisoformat(pub_date), int(recipe_id))
+            except (AttributeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        keys = get_keys(after, self.page_size + 1)
+        self.has_next = len(keys) > self.page_size
+        keys = keys[:self.page_size]
+        self.last_key = keys[-1] if keys else None
+        return keys
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        pub_date, recipe_id = self.last_key
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=False,
+            position=f'{pub_date.isoformat()}|{recipe_id}'
+        ))
+
+    def get_previous_link(self):
+        return None
+
+
+class OptionalCursorPaginationMixin:
+    """
+    Курсорная пагинация по запросу: ?pagination=cursor
+    или переданный курсор. По умолчанию - постраничная; она же
+    используется, когда cursor_pagination_allowed() возвращает False.
+    """
+
+    cursor_pagination_class = LimitCursorPagination
+
+    def cursor_pagination_allowed(self):
+        return True
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if self.cursor_pagination_allowed() and (
+                    params.get('pagination') == 'cursor'
+                    or self.cursor_pagination_class.cursor_query_param
+                    in params):
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
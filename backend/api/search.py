@@ -0,0 +1,58 @@
+import time
+from bisect import bisect_left
+
+from recipes.models import Ingredient
+from .cache import INGREDIENTS_CACHE, get_version
+
+INDEX_CHECK_INTERVAL = 1
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса для автодополнения.
+    Сначала возвращает совпадения по началу названия, затем по подстроке.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.checked_at = 0
+        self.keys = []
+        self.rows = []
+
+    def refresh(self):
+        """Перестроение индекса после смены версии справочника."""
+
+        now = time.monotonic()
+        if now - self.checked_at < INDEX_CHECK_INTERVAL:
+            return
+        version = get_version(INGREDIENTS_CACHE)
+        if version != self.version:
+            rows = sorted(
+                Ingredient.objects.values('id', 'name', 'measurement_unit'),
+                key=lambda row: (row['name'].lower(), row['id'])
+            )
+            self.keys = [row['name'].lower() for row in rows]
+            self.rows = rows
+            self.version = version
+        self.checked_at = now
+
+    def search(self, query, limit=None):
+        self.refresh()
+        keys, rows = self.keys, self.rows
+        query = query.lower()
+
+        start = bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        results = rows[start:end][:limit]
+
+        for key, row in zip(keys, rows):
+            if limit is not None and len(results) >= limit:
+                break
+            if query in key and not key.startswith(query):
+                results.append(row)
+        return results
+
+
+ingredient_index = IngredientIndex()
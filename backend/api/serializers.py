@@ -1,18 +1,48 @@
 from collections import Counter
 
 from djoser.serializers import (UserSerializer as DjoserUserSerializer)
-from rest_framework import status
+from django.conf import settings
+from django.core.files.storage import default_storage
 from django.core.validators import RegexValidator
+from django.db import models
 from django.db.transaction import atomic
 from rest_framework import serializers
-from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from rest_framework.validators import UniqueTogetherValidator
 from drf_extra_fields.fields import Base64ImageField
 
-from recipes.models import (Recipe, Tags, Ingredient, Favorite,
-                            RecipeIngredient, ShoppingList)
+from recipes.counters import delete_related, recount_ingredients
+from recipes.images import (VARIANT_FORMATS, VARIANTS, get_variant_names,
+                            strip_metadata)
+from recipes.models import Recipe, Tags, Ingredient, RecipeIngredient
 from users.models import User, Follow
+from .constants import (BULK_RECIPES_LIMIT, COOKABLE_LIMIT,
+                        COOKABLE_MAX_INGREDIENTS, COOKABLE_MAX_LIMIT,
+                        COOKABLE_MAX_MISSING)
+from .utils import get_following_ids
+
+
+class RecipeImageField(Base64ImageField):
+    """
+    Изображение рецепта в base64: размер проверяется до декодирования,
+    метаданные удаляются.
+    """
+
+    def to_internal_value(self, base64_data):
+        if isinstance(base64_data, str):
+            encoded = base64_data.split(';base64,')[-1]
+            if len(encoded) * 3 // 4 > settings.RECIPE_IMAGE_MAX_SIZE:
+                raise ValidationError(
+                    'Размер изображения не должен превышать '
+                    f'{settings.RECIPE_IMAGE_MAX_SIZE // 1024 // 1024} МБ'
+                )
+        image = super().to_internal_value(base64_data)
+        if image is None:
+            return None
+        try:
+            return strip_metadata(image)
+        except ValueError as error:
+            raise ValidationError(str(error))
 
 
 class SignUpSerializer(DjoserUserSerializer):
@@ -52,15 +82,17 @@ class UserSerializer(DjoserUserSerializer):
         model = User
         fields = (
             'email', 'id', 'username', 'first_name', 'last_name',
-            'is_subscribed'
+            'is_subscribed', 'followers_count'
         )
 
     def get_is_subscribed(self, object):
         """Подписан ли пользователь на автора."""
 
-        user = self.context.get('request').user
-        if user and user.is_authenticated:
-            return user.follower.filter(author=object).exists()
+        if hasattr(object, 'is_subscribed'):
+            return object.is_subscribed
+        request = self.context.get('request')
+        if request and request.user.is_authenticated:
+            return object.id in get_following_ids(request)
         return False
 
 
@@ -113,26 +145,47 @@ class UserMeSerializer(serializers.ModelSerializer):
                   'is_subscribed')
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class ShortRecipeSerializer(serializers.ModelSerializer):
 
     class Meta:
-        model = Favorite
-        fields = ('user', 'recipe')
-        read_only_fields = ['id']
-        validators = (
-            UniqueTogetherValidator(
-                queryset=Favorite.objects.all(),
-                fields=('user', 'recipe'),
-                message='Рецепт уже в избранном'
-            ),
-        )
+        model = Recipe
+        fields = ('id', 'name', 'image', 'cooking_time')
 
 
-class ShortRecipeSerializer(serializers.ModelSerializer):
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для пакетных операций."""
 
-    class Meta:
-        model = Recipe
-        fields = "__all__"
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_RECIPES_LIMIT
+    )
+
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
+
+
+class CookableRecipesSerializer(serializers.Serializer):
+    """Параметры подбора рецептов по имеющимся ингредиентам."""
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=COOKABLE_MAX_INGREDIENTS
+    )
+    max_missing = serializers.IntegerField(
+        min_value=0,
+        max_value=COOKABLE_MAX_MISSING,
+        default=COOKABLE_MAX_MISSING
+    )
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=COOKABLE_MAX_LIMIT,
+        default=COOKABLE_LIMIT
+    )
+
+    def validate_ingredients(self, value):
+        return list(set(value))
 
 
 class FollowSerializer(serializers.ModelSerializer):
@@ -166,29 +219,22 @@ class FollowingSerializer(UserSerializer):
     """Сериализатор для вывода информации о подписках."""
 
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = User
         fields = (
             'email', 'id', 'username', 'first_name', 'last_name',
-            'is_subscribed', 'recipes', 'recipes_count'
+            'is_subscribed', 'followers_count', 'recipes', 'recipes_count'
         )
 
-    @staticmethod
-    def get_recipes(object):
+    def get_recipes(self, object):
         """Получаем рецепты с уменьшенным набором полей."""
 
         return ShortRecipeSerializer(
-            object.recipes.all(), many=True
+            object.recipes.all(), many=True, context=self.context
         ).data
 
-    @staticmethod
-    def get_recipes_count(object):
-        """Получение количества рецептов."""
-
-        return object.recipes.count()
-
 
 class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField()
@@ -199,6 +245,99 @@ class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
+def build_url(request, url):
+    return request.build_absolute_uri(url) if request else url
+
+
+def get_image_variant_urls(recipe, request):
+    """
+    Ссылки на все варианты изображения. Пока варианты не созданы,
+    каждая ссылка указывает на оригинал, формат ответа не меняется.
+    """
+
+    image = recipe.image
+    if not image:
+        return None
+    if recipe.image_variants_source != image.name:
+        url = build_url(request, image.url)
+        return {
+            variant: {extension: url for extension in VARIANT_FORMATS}
+            for variant in VARIANTS
+        }
+    return {
+        variant: {
+            extension: build_url(request, default_storage.url(variant_name))
+            for extension, variant_name in names.items()
+        }
+        for variant, names in get_variant_names(image.name).items()
+    }
+
+
+class RecipesReadListSerializer(serializers.ListSerializer):
+    """
+    Облегченное представление списка рецептов: словари собираются
+    напрямую из экземпляров с предзагруженными связями, без создания
+    полей DRF на каждый объект. Формат совпадает с RecipesReadSerializer.
+    """
+
+    def to_representation(self, data):
+        request = self.context.get('request')
+        if isinstance(data, models.Manager):
+            data = data.all()
+        return [self.represent_recipe(recipe, request) for recipe in data]
+
+    @staticmethod
+    def represent_recipe(recipe, request):
+        author = recipe.author
+        if hasattr(author, 'is_subscribed'):
+            is_subscribed = author.is_subscribed
+        elif request and request.user.is_authenticated:
+            is_subscribed = author.id in get_following_ids(request)
+        else:
+            is_subscribed = False
+        image = recipe.image
+        return {
+            'id': recipe.id,
+            'tags': [
+                {
+                    'id': tag.id,
+                    'name': tag.name,
+                    'color': tag.color,
+                    'slug': tag.slug,
+                }
+                for tag in recipe.tags.all()
+            ],
+            'author': {
+                'email': author.email,
+                'id': author.id,
+                'username': author.username,
+                'first_name': author.first_name,
+                'last_name': author.last_name,
+                'is_subscribed': is_subscribed,
+                'followers_count': author.followers_count,
+            },
+            'ingredients': [
+                {
+                    'id': item.ingredient.id,
+                    'name': item.ingredient.name,
+                    'measurement_unit': item.ingredient.measurement_unit,
+                    'amount': item.amount,
+                }
+                for item in recipe.recipes_ingredients.all()
+            ],
+            'is_favorited': bool(getattr(recipe, 'is_favorited', False)),
+            'is_in_shopping_cart': bool(
+                getattr(recipe, 'is_in_shopping_cart', False)
+            ),
+            'name': recipe.name,
+            'image': build_url(request, image.url) if image else None,
+            'image_variants': get_image_variant_urls(recipe, request),
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'favorites_count': recipe.favorites_count,
+        }
+
+
 class RecipesReadSerializer(serializers.ModelSerializer):
     """Сериализатор для просмотра рецептов."""
 
@@ -209,6 +348,7 @@ class RecipesReadSerializer(serializers.ModelSerializer):
     )
     tags = TagsSerializer(many=True, read_only=True)
     image = Base64ImageField()
+    image_variants = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.BooleanField(
         read_only=True, default=False
     )
@@ -221,8 +361,15 @@ class RecipesReadSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = (
             'id', 'tags', 'author', 'ingredients', 'is_favorited',
-            'is_in_shopping_cart', 'name', 'image', 'text', 'cooking_time'
+            'is_in_shopping_cart', 'name', 'image', 'image_variants', 'text',
+            'cooking_time', 'favorites_count'
         )
+        list_serializer_class = RecipesReadListSerializer
+
+    def get_image_variants(self, recipe):
+        """Ссылки на уменьшенные копии изображения (WebP и JPEG)."""
+
+        return get_image_variant_urls(recipe, self.context.get('request'))
 
 
 class RecipesWriteSerializer(serializers.ModelSerializer):
@@ -230,7 +377,7 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
 
     author = UserSerializer(read_only=True)
     ingredients = RecipeIngredientCreateSerializer(many=True)
-    image = Base64ImageField(required=True)
+    image = RecipeImageField(required=True)
 
     class Meta:
         model = Recipe
@@ -240,23 +387,28 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
         )
 
     def validate(self, data):
-        """Валидация на наличие ингредиентов и тегов в рецепте."""
-        ingredients = data.get('ingredients')
-        tags = data.get('tags')
-        image = data.get('image')
-        recipe = data.get('name')
-
-        if not any(recipe_alph.isalpha() for recipe_alph in recipe):
-            raise serializers.ValidationError('В названии должны быть буквы')
+        """
+        Валидация на наличие ингредиентов и тегов в рецепте.
+        При частичном обновлении проверяются только переданные поля.
+        """
 
-        if not ingredients:
-            raise serializers.ValidationError("Ingredients field is required.")
-
-        if not tags:
-            raise serializers.ValidationError("Tags field is required.")
+        recipe = data.get('name')
+        if recipe is not None or not self.partial:
+            if not any(recipe_alph.isalpha() for recipe_alph in recipe or ''):
+                raise serializers.ValidationError(
+                    'В названии должны быть буквы'
+                )
 
-        if not image:
-            raise serializers.ValidationError("Image field is required")
+        required = (
+            ('ingredients', 'Ingredients field is required.'),
+            ('tags', 'Tags field is required.'),
+            ('image', 'Image field is required'),
+        )
+        for field, message in required:
+            if self.partial and field not in data:
+                continue
+            if not data.get(field):
+                raise serializers.ValidationError(message)
 
         return data
 
@@ -281,6 +433,13 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
                 }]
             )
 
+        if Ingredient.objects.filter(
+            id__in=ingredient_count
+        ).count() != len(ingredient_count):
+            raise ValidationError(
+                [{'ingredients': ['Указанный ингредиент не существует']}]
+            )
+
         return ingredients
 
     @staticmethod
@@ -313,54 +472,84 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
     def add_ingredients(ingredients, recipe):
         """Добавление ингредиентов."""
 
-        recipe.ingredients.clear()
-
-        ingredient_ids = [item['id'] for item in ingredients]
-        db_ingredients = Ingredient.objects.in_bulk(ingredient_ids)
-
-        recipe_ingredients = [
+        RecipeIngredient.objects.bulk_create(
             RecipeIngredient(
-                ingredient=db_ingredients[item['id']],
+                ingredient_id=item['id'],
                 recipe=recipe,
                 amount=item['amount']
             )
             for item in ingredients
-        ]
+        )
 
-        RecipeIngredient.objects.bulk_create(recipe_ingredients)
+    @staticmethod
+    def update_ingredients(ingredients, recipe):
+        """
+        Изменение ингредиентов по разнице с текущими: одно удаление,
+        bulk_update измененных количеств и bulk_create новых.
+        """
+
+        current = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in recipe.recipes_ingredients.all()
+        }
+        submitted = {item['id']: item['amount'] for item in ingredients}
+
+        removed = [
+            recipe_ingredient.id
+            for ingredient_id, recipe_ingredient in current.items()
+            if ingredient_id not in submitted
+        ]
+        changed = []
+        for ingredient_id, recipe_ingredient in current.items():
+            amount = submitted.get(ingredient_id)
+            if amount is not None and amount != recipe_ingredient.amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        added = [
+            RecipeIngredient(
+                ingredient_id=ingredient_id,
+                recipe=recipe,
+                amount=amount
+            )
+            for ingredient_id, amount in submitted.items()
+            if ingredient_id not in current
+        ]
 
-    def add_tags(self, tags, recipe):
-        for tag in tags:
-            recipe.tags.add(tag)
+        if removed:
+            delete_related(RecipeIngredient.objects.filter(id__in=removed))
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        if added:
+            RecipeIngredient.objects.bulk_create(added)
 
     @atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
         image = validated_data.pop('image')
-        recipe = Recipe.objects.create(image=image, **validated_data)
+        recipe = Recipe.objects.create(
+            image=image,
+            ingredients_count=len(ingredients_data),
+            **validated_data
+        )
         recipe.tags.set(tags_data)
         self.add_ingredients(ingredients_data, recipe)
         return recipe
 
     @atomic
     def update(self, instance, validated_data):
-        print(instance)
-        """Изменение рецепта автором."""
-        data = validated_data.copy()
-        if 'ingredient' in data:
-            try:
-                RecipeIngredient.objects.get(recipe=instance,
-                                             ingredient=data['ingredient'])
-            except RecipeIngredient.DoesNotExist:
-                return Response(
-                    {'detail': 'Указанный ингредиент не существует'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        instance.tags.clear()
-        RecipeIngredient.objects.filter(recipe=instance).delete()
-        self.add_tags(validated_data.pop('tags'), instance)
-        self.add_ingredients(validated_data.pop('ingredients'), instance)
+        """
+        Изменение рецепта автором. Тэги и ингредиенты меняются
+        по разнице с текущими, не переданные в PATCH не затрагиваются.
+        """
+
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        if tags is not None:
+            instance.tags.set(tags)
+        if ingredients is not None:
+            self.update_ingredients(ingredients, instance)
+            recount_ingredients(instance.pk)
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
@@ -369,18 +558,3 @@ class RecipesWriteSerializer(serializers.ModelSerializer):
         return RecipesReadSerializer(
             instance, context={'request': self.context.get('request')}
         ).data
-
-
-class ShoppingListSerializer(serializers.ModelSerializer):
-    """Сериализатор для добавления в список покупок."""
-
-    class Meta:
-        model = ShoppingList
-        fields = ('user', 'recipe')
-        validators = (
-            UniqueTogetherValidator(
-                queryset=ShoppingList.objects.all(),
-                fields=('user', 'recipe'),
-                message='Рецепт уже в списке покупок'
-            ),
-        )
@@ -0,0 +1,50 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tags
+from users.models import User
+from .cache import (INGREDIENTS_CACHE, RECIPES_CACHE, TAGS_CACHE,
+                    bump_version)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+@receiver(post_delete, sender=User)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipes_cache(**kwargs):
+    """
+    Сброс кэша ленты рецептов при изменении отображаемых данных.
+    Счетчики (favorites_count, followers_count) меняются UPDATE без
+    сигналов и кэш не сбрасывают: в закэшированных страницах для
+    анонимных пользователей они отстают не более чем на
+    RECIPES_CACHE_TIMEOUT, что отражено в документации API.
+    """
+
+    bump_version(RECIPES_CACHE)
+
+
+@receiver(post_save, sender=User)
+def invalidate_recipes_cache_on_user_change(update_fields, **kwargs):
+    """Вход пользователя (обновление last_login) кэш не сбрасывает."""
+
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_version(RECIPES_CACHE)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients_cache(**kwargs):
+    """Сброс справочника ингредиентов и зависящей от него ленты."""
+
+    bump_version(INGREDIENTS_CACHE, RECIPES_CACHE)
+
+
+@receiver(post_save, sender=Tags)
+@receiver(post_delete, sender=Tags)
+def invalidate_tags_cache(**kwargs):
+    """Сброс справочника тэгов и зависящей от него ленты."""
+
+    bump_version(TAGS_CACHE, RECIPES_CACHE)
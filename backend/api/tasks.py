@@ -0,0 +1,137 @@
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import django
+from django.conf import settings
+
+from .utils import create_shopping_cart
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+_executor = None
+_futures = {}
+
+
+def get_executor():
+    """Пул процессов для генерации pdf-файлов (создается по требованию)."""
+
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.SHOPPING_CART_JOBS_WORKERS,
+            initializer=django.setup,
+        )
+    return _executor
+
+
+def get_job_path(job_id):
+    return Path(settings.SHOPPING_CART_JOBS_ROOT) / f'{job_id}.json'
+
+
+def get_artifact_path(job_id):
+    return Path(settings.SHOPPING_CART_JOBS_ROOT) / f'{job_id}.pdf'
+
+
+def save_job(job):
+    """
+    Состояние задачи хранится в json-файле рядом с результатом,
+    а не в кэше, из которого запись может быть вытеснена.
+    """
+
+    path = get_job_path(job['id'])
+    tmp_path = path.with_suffix('.json.tmp')
+    tmp_path.write_text(json.dumps(job))
+    os.replace(tmp_path, path)
+
+
+def load_job(job_id):
+    path = get_job_path(job_id)
+    expired = time.time() - settings.SHOPPING_CART_JOBS_TTL
+    try:
+        if path.stat().st_mtime < expired:
+            return None
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def render_shopping_cart(job_id, username, ingredients, current_date):
+    """Генерация pdf-файла в процессе пула."""
+
+    path = get_artifact_path(job_id)
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_bytes(
+        create_shopping_cart(username, ingredients, current_date)
+    )
+    os.replace(tmp_path, path)
+
+
+def finish_job(job_id, future):
+    job = load_job(job_id)
+    _futures.pop(job_id, None)
+    if job is None:
+        return
+    job['status'] = JOB_FAILED if future.exception() else JOB_DONE
+    save_job(job)
+
+
+def cleanup_expired_jobs():
+    """Удаление файлов задач, срок хранения которых истек."""
+
+    expired = time.time() - settings.SHOPPING_CART_JOBS_TTL
+    for path in Path(settings.SHOPPING_CART_JOBS_ROOT).glob('*.*'):
+        try:
+            if path.stat().st_mtime < expired:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def enqueue_shopping_cart(user, ingredients, current_date):
+    """
+    Постановка генерации списка покупок в очередь.
+    Возвращает задачу или None, если очередь заполнена.
+    """
+
+    if len(_futures) >= settings.SHOPPING_CART_JOBS_MAX_PENDING:
+        return None
+
+    os.makedirs(settings.SHOPPING_CART_JOBS_ROOT, exist_ok=True)
+    cleanup_expired_jobs()
+
+    job = {
+        'id': uuid.uuid4().hex,
+        'user_id': user.id,
+        'filename': f'{user.username}_download_list.pdf',
+        'status': JOB_PENDING,
+    }
+    save_job(job)
+    future = get_executor().submit(
+        render_shopping_cart, job['id'], user.username,
+        list(ingredients), current_date
+    )
+    _futures[job['id']] = future
+    future.add_done_callback(partial(finish_job, job['id']))
+    return job
+
+
+def get_job(job_id, user):
+    """Задача пользователя с актуальным статусом или None."""
+
+    job = load_job(job_id)
+    if job is None or job['user_id'] != user.id:
+        return None
+    future = _futures.get(job_id)
+    if job['status'] == JOB_PENDING and future and future.running():
+        job['status'] = JOB_RUNNING
+    if job['status'] == JOB_DONE and not get_artifact_path(job_id).exists():
+        return None
+    return job
@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tags
+from users.models import Follow, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def create_image(color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', (40, 30), color).save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue(), name='image.png')
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        password='password',
+        first_name='Имя',
+        last_name='Фамилия'
+    )
+
+
+def create_recipe(author, tags=(), ingredients=(), name='Рецепт'):
+    recipe = Recipe.objects.create(
+        author=author,
+        name=name,
+        text='Описание рецепта',
+        cooking_time=10,
+        image=create_image(),
+        ingredients_count=len(ingredients)
+    )
+    recipe.tags.set(tags)
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+        for ingredient in ingredients
+    )
+    return recipe
+
+
+def get_client(user=None):
+    client = APIClient()
+    if user is not None:
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+class RecipesDataMixin:
+    """Пользователи, тэги, ингредиенты и рецепты для тестов API."""
+
+    recipes_number = 8
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_settings = override_settings(MEDIA_ROOT=MEDIA_ROOT)
+        cls.media_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+        cls.authors = [create_user(f'author{i}') for i in range(3)]
+        cls.tags = [
+            Tags.objects.create(
+                name=f'Тэг {i}', color=f'#00000{i}', slug=f'tag{i}'
+            )
+            for i in range(4)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {i}', measurement_unit='г'
+            )
+            for i in range(5)
+        ]
+        cls.recipes = [
+            create_recipe(
+                cls.authors[i % len(cls.authors)],
+                tags=cls.tags[:1 + i % len(cls.tags)],
+                ingredients=cls.ingredients[:1 + i % len(cls.ingredients)],
+                name=f'Рецепт {i}'
+            )
+            for i in range(cls.recipes_number)
+        ]
+        Follow.objects.create(follower=cls.user, author=cls.authors[0])
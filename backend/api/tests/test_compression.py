@@ -0,0 +1,28 @@
+from django.test import SimpleTestCase
+from rest_framework.test import APIRequestFactory
+
+from api.compression import get_accepted_encoding
+
+
+class AcceptedEncodingTest(SimpleTestCase):
+    """Выбор сжатия по Accept-Encoding с учетом q."""
+
+    cases = (
+        ('', None),
+        ('gzip, deflate, br', 'br'),
+        ('gzip', 'gzip'),
+        ('br;q=0.1, gzip;q=1.0', 'gzip'),
+        ('br;q=1.0, gzip;q=0.5', 'br'),
+        ('br;q=0.5, gzip;q=0.5', 'br'),
+        ('br;q=0, gzip;q=0', None),
+        ('*;q=0.3, gzip;q=0.8', 'gzip'),
+        ('*', 'br'),
+        ('identity', None),
+    )
+
+    def test_encodings(self):
+        factory = APIRequestFactory()
+        for header, expected in self.cases:
+            with self.subTest(header=header):
+                request = factory.get('/', HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(get_accepted_encoding(request), expected)
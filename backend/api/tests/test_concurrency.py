@@ -0,0 +1,83 @@
+import threading
+from unittest import mock
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from recipes.models import Favorite, Recipe, ShoppingList
+from users.models import Follow
+from .fixtures import RecipesDataMixin, get_client
+
+THREADS_NUMBER = 8
+
+
+class ConcurrentAddTest(RecipesDataMixin, TransactionTestCase):
+    """
+    Параллельные одинаковые запросы на добавление: одна запись,
+    один ответ 201, остальные получают 400, ошибок сервера нет.
+    """
+
+    recipes_number = 1
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Нужна БД, доступная из нескольких соединений')
+        super().setUp()
+        # Фоновая генерация вариантов изображений не должна блокировать БД.
+        with mock.patch('recipes.signals.schedule_variants'):
+            self.setUpTestData()
+        self.recipe = self.recipes[0]
+
+    def post_in_parallel(self, url):
+        barrier = threading.Barrier(THREADS_NUMBER)
+        statuses = []
+
+        def post():
+            client = get_client(self.user)
+            try:
+                barrier.wait()
+                statuses.append(client.post(url).status_code)
+            except Exception:
+                statuses.append(500)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=post) for _ in range(THREADS_NUMBER)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(statuses)
+
+    def assertOneCreated(self, statuses):
+        self.assertEqual(statuses, [201] + [400] * (THREADS_NUMBER - 1))
+
+    def test_favorite(self):
+        self.assertOneCreated(self.post_in_parallel(
+            f'/api/recipes/{self.recipe.id}/favorite/'
+        ))
+        self.assertEqual(Favorite.objects.count(), 1)
+        self.assertEqual(
+            Recipe.objects.get(pk=self.recipe.pk).favorites_count, 1
+        )
+
+    def test_shopping_cart(self):
+        self.assertOneCreated(self.post_in_parallel(
+            f'/api/recipes/{self.recipe.id}/shopping_cart/'
+        ))
+        self.assertEqual(ShoppingList.objects.count(), 1)
+        self.assertEqual(
+            Recipe.objects.get(pk=self.recipe.pk).shopping_lists_count, 1
+        )
+
+    def test_subscribe(self):
+        author = self.authors[1]
+        self.assertOneCreated(self.post_in_parallel(
+            f'/api/users/{author.id}/subscribe/'
+        ))
+        self.assertEqual(
+            Follow.objects.filter(follower=self.user, author=author).count(),
+            1
+        )
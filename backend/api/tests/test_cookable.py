@@ -0,0 +1,51 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from api.utils import get_cookable_recipes
+from recipes.models import Recipe
+from .fixtures import RecipesDataMixin, get_client
+
+
+class CookableRecipesTest(RecipesDataMixin, TestCase):
+    """Рецепты по имеющимся ингредиентам."""
+
+    def get_cookable(self):
+        return get_client().get('/api/recipes/cookable/', {
+            'ingredients': [
+                ingredient.id for ingredient in self.ingredients[:2]
+            ],
+            'max_missing': 0,
+        })
+
+    def test_fully_covered_recipes(self):
+        response = self.get_cookable()
+        self.assertEqual(response.status_code, 200)
+        expected = {
+            recipe.id for recipe in self.recipes
+            if recipe.ingredients_count <= 2
+        }
+        self.assertEqual(
+            {recipe['id'] for recipe in response.json()}, expected
+        )
+        for recipe in response.json():
+            self.assertEqual(recipe['missing_ingredients'], 0)
+            self.assertEqual(recipe['coverage'], 1)
+
+    def test_recipe_deleted_after_ranking(self):
+        deleted = []
+
+        def rank_then_delete(**params):
+            ranked = list(get_cookable_recipes(**params))
+            Recipe.objects.filter(pk=ranked[0]['id']).delete()
+            deleted.append(ranked[0]['id'])
+            return ranked
+
+        with mock.patch(
+            'api.views.get_cookable_recipes', side_effect=rank_then_delete
+        ):
+            response = self.get_cookable()
+        self.assertEqual(response.status_code, 200)
+        ids = [recipe['id'] for recipe in response.json()]
+        self.assertTrue(ids)
+        self.assertNotIn(deleted[0], ids)
@@ -0,0 +1,141 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Favorite, Recipe, RecipeIngredient, ShoppingList
+from users.models import Follow, User
+from .fixtures import RecipesDataMixin, get_client
+
+
+class BulkCountersTest(RecipesDataMixin, TestCase):
+    """Счетчики рецептов после пакетных операций совпадают с фактом."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = get_client(self.user)
+        self.ids = [recipe.id for recipe in self.recipes]
+
+    def assertCounters(self, model, field):
+        for recipe in Recipe.objects.all():
+            self.assertEqual(
+                getattr(recipe, field),
+                model.objects.filter(recipe=recipe).count()
+            )
+
+    def test_bulk_add_recounts_drifted_counters(self):
+        Recipe.objects.update(favorites_count=5)
+        response = self.client.post(
+            '/api/recipes/favorite/', {'recipes': self.ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertCounters(Favorite, 'favorites_count')
+
+    def test_bulk_delete_recounts_counters(self):
+        self.client.post(
+            '/api/recipes/favorite/', {'recipes': self.ids}, format='json'
+        )
+        response = self.client.delete(
+            '/api/recipes/favorite/', {'recipes': self.ids[:3]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Favorite.objects.count(), len(self.ids) - 3)
+        self.assertCounters(Favorite, 'favorites_count')
+
+    def test_bulk_delete_query_count_is_constant(self):
+        self.client.post(
+            '/api/recipes/shopping_cart/', {'recipes': self.ids},
+            format='json'
+        )
+        queries = []
+        for ids in (self.ids[:2], self.ids[2:]):
+            with CaptureQueriesContext(connection) as context:
+                self.client.delete(
+                    '/api/recipes/shopping_cart/', {'recipes': ids},
+                    format='json'
+                )
+            queries.append(len(context))
+        self.assertEqual(queries[0], queries[1])
+        self.assertCounters(ShoppingList, 'shopping_lists_count')
+
+    def test_clear_shopping_cart_recounts_counters(self):
+        self.client.post(
+            '/api/recipes/shopping_cart/', {'recipes': self.ids},
+            format='json'
+        )
+        response = self.client.delete('/api/recipes/shopping_cart/clear/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(ShoppingList.objects.exists())
+        self.assertCounters(ShoppingList, 'shopping_lists_count')
+        response = self.client.delete('/api/recipes/shopping_cart/clear/')
+        self.assertEqual(response.status_code, 404)
+
+
+class IngredientsCountTest(RecipesDataMixin, TestCase):
+    """ingredients_count следует за строками RecipeIngredient."""
+
+    def assertIngredientsCount(self):
+        for recipe in Recipe.objects.all():
+            self.assertEqual(
+                recipe.ingredients_count,
+                RecipeIngredient.objects.filter(recipe=recipe).count()
+            )
+
+    def test_ingredient_delete_cascades_to_counter(self):
+        self.ingredients[0].delete()
+        self.assertIngredientsCount()
+
+    def test_single_row_changes(self):
+        recipe = self.recipes[0]
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=self.ingredients[4], amount=1
+        )
+        self.assertIngredientsCount()
+        RecipeIngredient.objects.filter(recipe=recipe).first().delete()
+        self.assertIngredientsCount()
+
+    def test_recipe_update_removes_ingredients(self):
+        recipe = self.recipes[4]
+        response = get_client(recipe.author).patch(
+            f'/api/recipes/{recipe.id}/',
+            {'ingredients': [{'id': self.ingredients[0].id, 'amount': 2}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Recipe.objects.get(pk=recipe.pk).ingredients_count, 1)
+        self.assertIngredientsCount()
+
+
+class StaleSaveTest(RecipesDataMixin, TestCase):
+    """Сохранение загруженного ранее объекта не откатывает счетчики."""
+
+    def test_recipe_save_keeps_counters(self):
+        recipe = Recipe.objects.get(pk=self.recipes[0].pk)
+        get_client(self.user).post(f'/api/recipes/{recipe.id}/favorite/')
+        recipe.name = 'Новое название'
+        recipe.save()
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        self.assertEqual(recipe.name, 'Новое название')
+        self.assertEqual(recipe.favorites_count, 1)
+
+    def test_recipe_update_keeps_counters(self):
+        recipe = self.recipes[0]
+        get_client(self.user).post(f'/api/recipes/{recipe.id}/favorite/')
+        response = get_client(recipe.author).patch(
+            f'/api/recipes/{recipe.id}/', {'name': 'Новое название'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Recipe.objects.get(pk=recipe.pk).favorites_count, 1)
+
+    def test_user_save_keeps_counters(self):
+        author = User.objects.get(pk=self.authors[1].pk)
+        Follow.objects.create(follower=self.user, author=author)
+        author.set_password('new-password')
+        author.save()
+        author = User.objects.get(pk=author.pk)
+        self.assertTrue(author.check_password('new-password'))
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(author.recipes_count, Recipe.objects.filter(
+            author=author
+        ).count())
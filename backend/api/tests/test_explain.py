@@ -0,0 +1,129 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from api.filters import RecipeFilter
+from api.utils import get_cookable_recipes, get_shopping_cart_ingredients
+from api.views import RecipesViewSet
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingList, Tags)
+from users.models import User
+
+INDEX_SCAN = r'Index (Only )?Scan using {index} on {table}'
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN только в PostgreSQL')
+class LookupIndexesTest(TestCase):
+    """Горячие запросы используют индексы на заполненной базе."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create(
+            User(
+                username=f'user{i}', email=f'user{i}@example.com',
+                first_name='Имя', last_name='Фамилия'
+            )
+            for i in range(50)
+        )
+        cls.user = users[0]
+        tags = Tags.objects.bulk_create(
+            Tags(name=f'Тэг {i}', color=f'#0000{i:02}', slug=f'tag{i}')
+            for i in range(10)
+        )
+        cls.ingredients = ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+            for i in range(200)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                author=users[i % len(users)], name=f'Рецепт {i}',
+                text='Описание', cooking_time=10,
+                image='recipes/images/image.png', pub_date=timezone.now()
+            )
+            for i in range(2000)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tags=tags[(i + j) % 10])
+            for i, recipe in enumerate(recipes)
+            for j in range(2)
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient=ingredients[(i + j) % 200],
+                amount=1
+            )
+            for i, recipe in enumerate(recipes)
+            for j in range(5)
+        )
+        for model in (Favorite, ShoppingList):
+            model.objects.bulk_create(
+                model(user=user, recipe=recipes[(i * 7 + j) % 2000])
+                for i, user in enumerate(users)
+                for j in range(20)
+            )
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            # На небольших таблицах последовательное чтение дешевле,
+            # проверяется, что индекс вообще применим к запросу.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        request = APIRequestFactory().get('/api/recipes/')
+        request.user = self.user
+        self.request = request
+
+    def assert_index_scan(self, queryset, index, table):
+        self.assertRegex(
+            queryset.explain(),
+            INDEX_SCAN.format(index=index, table=table)
+        )
+
+    def test_recipes_exists_subqueries(self):
+        view = RecipesViewSet(request=self.request, format_kwarg=None)
+        queryset = view.get_queryset()
+        self.assert_index_scan(
+            queryset, 'unique_user_recipe_favorite', 'recipes_favorite'
+        )
+        self.assert_index_scan(
+            queryset, 'unique_user_recipe_shopping_list',
+            'recipes_shoppinglist'
+        )
+
+    def test_recipes_ordering(self):
+        self.assert_index_scan(
+            Recipe.objects.order_by('-pub_date', '-id')[:6],
+            'recipe_pub_date_id_idx', 'recipes_recipe'
+        )
+
+    def test_tags_filter(self):
+        queryset = RecipeFilter(
+            {'tags': ['tag1', 'tag2']},
+            queryset=Recipe.objects.all(),
+            request=self.request
+        ).qs
+        self.assert_index_scan(
+            queryset, r'recipes_recipe_tags_\w+', 'recipes_recipe_tags'
+        )
+
+    def test_shopping_cart_ingredients(self):
+        queryset = get_shopping_cart_ingredients(self.user)
+        self.assert_index_scan(
+            queryset, 'unique_user_recipe_shopping_list',
+            'recipes_shoppinglist'
+        )
+        self.assert_index_scan(
+            queryset,
+            r'(unique_recipe_ingredient|recipes_recipeingredient_\w+)',
+            'recipes_recipeingredient'
+        )
+
+    def test_cookable_recipes(self):
+        queryset = get_cookable_recipes(
+            [ingredient.id for ingredient in self.ingredients[:20]], 2, 10
+        )
+        self.assert_index_scan(
+            queryset, 'ingredient_recipe_idx', 'recipes_recipeingredient'
+        )
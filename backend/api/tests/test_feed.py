@@ -0,0 +1,78 @@
+from django.test import TestCase, override_settings
+
+from recipes.models import FeedEntry
+from users.models import Follow, User
+from .fixtures import RecipesDataMixin, create_recipe, create_user, get_client
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=2)
+class FeedTest(RecipesDataMixin, TestCase):
+    """Лента подписок: курсорная выдача и смена режима раскладки."""
+
+    recipes_number = 12
+
+    def setUp(self):
+        super().setUp()
+        self.client = get_client(self.user)
+        Follow.objects.create(follower=self.user, author=self.authors[1])
+
+    def get_feed(self, **params):
+        data = self.client.get(
+            '/api/recipes/feed/', {'limit': 2, **params}
+        ).json()
+        ids = [recipe['id'] for recipe in data['results']]
+        while data['next']:
+            data = self.client.get(data['next']).json()
+            ids.extend(recipe['id'] for recipe in data['results'])
+        return ids
+
+    def expected(self):
+        return [
+            recipe.id for recipe in sorted(
+                (
+                    recipe for recipe in self.recipes
+                    if recipe.author in self.authors[:2]
+                ),
+                key=lambda recipe: (recipe.pub_date, recipe.id),
+                reverse=True
+            )
+        ]
+
+    def test_feed_pages(self):
+        self.assertEqual(self.get_feed(), self.expected())
+
+    def test_feed_filters(self):
+        ids = self.get_feed(tags='tag3')
+        self.assertEqual(ids, [
+            recipe_id for recipe_id in self.expected()
+            if self.tags[3].recipes.filter(id=recipe_id).exists()
+        ])
+
+    def test_feed_query_count(self):
+        with self.assertNumQueries(7):
+            self.client.get('/api/recipes/feed/', {'limit': 2})
+
+    def test_feed_across_fanout_threshold(self):
+        author = self.authors[0]
+        followers = [create_user(f'follower{i}') for i in range(2)]
+        for follower in followers:
+            Follow.objects.create(follower=follower, author=author)
+        author.refresh_from_db()
+        self.assertFalse(author.feed_fanout)
+        self.assertFalse(FeedEntry.objects.filter(author=author).exists())
+        self.assertEqual(self.get_feed(), self.expected())
+
+        recipe = create_recipe(author, name='Новый рецепт')
+        self.recipes.append(recipe)
+        self.assertEqual(self.get_feed(), self.expected())
+
+        Follow.objects.filter(follower=followers[0], author=author).delete()
+        self.assertTrue(User.objects.get(pk=author.pk).feed_fanout)
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.user, author=author, recipe=recipe
+        ).exists())
+        self.assertEqual(self.get_feed(), self.expected())
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/recipes/feed/', {'cursor': 'bad'})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,40 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from recipes.models import Recipe
+from .fixtures import RecipesDataMixin, get_client
+
+
+class RecipeTagsFilterTest(RecipesDataMixin, TestCase):
+    """Фильтрация рецептов по нескольким тэгам."""
+
+    def get_recipes(self, slugs):
+        return get_client().get(
+            '/api/recipes/', {'tags': slugs, 'limit': 50}
+        ).json()
+
+    def test_recipes_are_not_duplicated(self):
+        slugs = ['tag2', 'tag3']
+        expected = set(Recipe.objects.filter(
+            tags__slug__in=slugs
+        ).values_list('id', flat=True))
+        data = self.get_recipes(slugs)
+        ids = [recipe['id'] for recipe in data['results']]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), expected)
+        self.assertEqual(data['count'], len(expected))
+
+    def test_every_recipe_has_one_of_tags(self):
+        slugs = ['tag1', 'tag3']
+        for recipe in self.get_recipes(slugs)['results']:
+            self.assertTrue(
+                {tag['slug'] for tag in recipe['tags']} & set(slugs)
+            )
+
+    def test_query_count_does_not_depend_on_tags_number(self):
+        slugs = [tag.slug for tag in self.tags]
+        for number in range(1, len(slugs) + 1):
+            cache.clear()
+            # тэги справочника, COUNT(*), рецепты, ингредиенты, тэги.
+            with self.assertNumQueries(5):
+                self.get_recipes(slugs[:number])
@@ -0,0 +1,76 @@
+import os
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+
+from recipes.images import get_variant_name
+from recipes.management.commands.cleanup_images import Command
+from recipes.models import Recipe
+from .fixtures import RecipesDataMixin, create_image, get_client
+
+
+class ImageVariantsTest(RecipesDataMixin, TestCase):
+    """Ссылки на варианты изображений появляются после их создания."""
+
+    recipes_number = 2
+
+    def get_recipe(self):
+        return get_client().get(f'/api/recipes/{self.recipes[0].id}/').json()
+
+    def get_list_recipe(self):
+        return get_client().get('/api/recipes/').json()['results'][0]
+
+    def test_variants_fall_back_to_image(self):
+        for recipe in (self.get_recipe(), self.get_list_recipe()):
+            for urls in recipe['image_variants'].values():
+                self.assertEqual(set(urls.values()), {recipe['image']})
+
+    def test_variants_exposed_after_backfill(self):
+        call_command('generate_image_variants', stdout=StringIO())
+        for recipe in (self.get_recipe(), self.get_list_recipe()):
+            for urls in recipe['image_variants'].values():
+                for url in urls.values():
+                    self.assertNotEqual(url, recipe['image'])
+                    path = url.split(settings.MEDIA_URL, 1)[1]
+                    self.assertTrue(
+                        os.path.exists(os.path.join(settings.MEDIA_ROOT, path))
+                    )
+
+
+class CleanupImagesTest(RecipesDataMixin, TestCase):
+    """Удаление неиспользуемых изображений и защита повторных загрузок."""
+
+    recipes_number = 1
+
+    def setUp(self):
+        super().setUp()
+        self.storage = Recipe._meta.get_field('image').storage
+        self.image = self.recipes[0].image.name
+        self.orphan = self.storage.save(
+            'recipes/images/orphan.png', create_image('blue')
+        )
+        old = time.time() - 2 * 60 * 60
+        for name in (self.image, self.orphan):
+            os.utime(self.storage.path(name), (old, old))
+
+    def test_existing_file_is_touched_on_save(self):
+        name = self.storage.save('recipes/images/again.png', create_image())
+        self.assertEqual(name, self.image)
+        self.assertGreater(
+            os.path.getmtime(self.storage.path(name)), time.time() - 60
+        )
+
+    def test_cleanup_keeps_referenced_files(self):
+        call_command('cleanup_images', stdout=StringIO())
+        self.assertTrue(self.storage.exists(self.image))
+        self.assertFalse(self.storage.exists(self.orphan))
+
+    def test_batch_is_rechecked_before_delete(self):
+        variant = get_variant_name(self.image, 'card', 'webp')
+        in_use = Command().get_referenced([self.image, variant, self.orphan])
+        self.assertIn(self.image, in_use)
+        self.assertIn(variant, in_use)
+        self.assertNotIn(self.orphan, in_use)
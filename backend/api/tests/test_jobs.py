@@ -0,0 +1,56 @@
+import shutil
+import tempfile
+import uuid
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from api.tasks import JOB_DONE, get_artifact_path, save_job
+from .fixtures import create_user, get_client
+
+
+class ShoppingCartJobTest(TestCase):
+    """Состояние задач списка покупок не зависит от кэша."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('reader')
+
+    def setUp(self):
+        jobs_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, jobs_root, ignore_errors=True)
+        jobs_settings = override_settings(SHOPPING_CART_JOBS_ROOT=jobs_root)
+        jobs_settings.enable()
+        self.addCleanup(jobs_settings.disable)
+        self.client = get_client(self.user)
+        self.job = {
+            'id': uuid.uuid4().hex,
+            'user_id': self.user.id,
+            'filename': 'reader_download_list.pdf',
+            'status': JOB_DONE,
+        }
+        save_job(self.job)
+        get_artifact_path(self.job['id']).write_bytes(b'%PDF-1.4')
+
+    def get_url(self, suffix=''):
+        return f'/api/recipes/shopping_cart_jobs/{self.job["id"]}/{suffix}'
+
+    def test_job_survives_cache_clear(self):
+        cache.clear()
+        response = self.client.get(self.get_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], JOB_DONE)
+        response = self.client.get(self.get_url('download/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4')
+
+    def test_other_user_job_is_hidden(self):
+        client = get_client(create_user('stranger'))
+        self.assertEqual(client.get(self.get_url()).status_code, 404)
+
+    def test_missing_artifact(self):
+        get_artifact_path(self.job['id']).unlink()
+        self.assertEqual(self.client.get(self.get_url()).status_code, 404)
+        self.assertEqual(
+            self.client.get(self.get_url('download/')).status_code, 404
+        )
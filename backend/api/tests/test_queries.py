@@ -0,0 +1,33 @@
+from django.test import TestCase
+
+from .fixtures import RecipesDataMixin, get_client
+
+
+class RecipesQueryCountTest(RecipesDataMixin, TestCase):
+    """Количество запросов ленты и рецепта не зависит от числа рецептов."""
+
+    recipes_number = 60
+
+    def assert_list_queries(self, client, limit, queries):
+        with self.assertNumQueries(queries):
+            response = client.get('/api/recipes/', {'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), limit)
+
+    def test_list_authenticated(self):
+        client = get_client(self.user)
+        # токен, COUNT(*), рецепты, ингредиенты, тэги, авторы.
+        self.assert_list_queries(client, 6, 6)
+        self.assert_list_queries(client, 50, 6)
+
+    def test_list_anonymous(self):
+        # COUNT(*), рецепты, ингредиенты, тэги.
+        self.assert_list_queries(get_client(), 6, 4)
+        self.assert_list_queries(get_client(), 50, 4)
+
+    def test_detail(self):
+        client = get_client(self.user)
+        with self.assertNumQueries(5):
+            response = client.get(f'/api/recipes/{self.recipes[0].id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['author']['is_subscribed'])
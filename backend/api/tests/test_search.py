@@ -0,0 +1,21 @@
+from django.test import TestCase
+
+from .fixtures import RecipesDataMixin, get_client
+
+
+class RecipeSearchPaginationTest(RecipesDataMixin, TestCase):
+    """Поиск не переключается на курсорную пагинацию по дате."""
+
+    def test_cursor_mode_is_ignored_with_search(self):
+        data = get_client(self.user).get('/api/recipes/', {
+            'search': 'Рецепт', 'pagination': 'cursor', 'limit': 3
+        }).json()
+        self.assertEqual(data['count'], self.recipes_number)
+        self.assertIn('page=2', data['next'])
+
+    def test_cursor_mode_without_search(self):
+        data = get_client(self.user).get('/api/recipes/', {
+            'pagination': 'cursor', 'limit': 3
+        }).json()
+        self.assertNotIn('count', data)
+        self.assertIn('cursor=', data['next'])
@@ -0,0 +1,40 @@
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import F
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipesReadSerializer
+from api.views import RecipesViewSet
+from recipes.models import Recipe
+from .fixtures import RecipesDataMixin
+
+
+class RecipesListSerializerTest(RecipesDataMixin, TestCase):
+    """Облегченный список совпадает с сериализацией по одному объекту."""
+
+    def setUp(self):
+        super().setUp()
+        Recipe.objects.filter(pk=self.recipes[0].pk).update(
+            image_variants_source=F('image')
+        )
+
+    def assertParity(self, user):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = user
+        view = RecipesViewSet(request=request, action='list')
+        queryset = view.get_queryset().order_by('id')
+        context = {'request': request}
+        self.assertEqual(
+            RecipesReadSerializer(queryset, many=True, context=context).data,
+            [
+                RecipesReadSerializer(recipe, context=context).data
+                for recipe in queryset
+            ]
+        )
+
+    def test_anonymous(self):
+        self.assertParity(AnonymousUser())
+
+    def test_authenticated(self):
+        self.assertParity(self.user)
@@ -1,15 +1,25 @@
+import csv
+import hashlib
 from datetime import datetime
 from io import BytesIO
 from weasyprint import HTML
 
-from django.db.models import Sum
+from django.db.models import (BooleanField, Count, Exists, F, OuterRef,
+                              Sum, Value, Window)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 from django.template.loader import render_to_string
 
 from foodgram.settings import TEMPLATES_DIR
-from recipes.models import RecipeIngredient
+from recipes.models import Recipe, RecipeIngredient
+from users.models import Follow
 
 
-def create_shopping_cart(username, ingredients):
+def get_current_date():
+    return datetime.today().strftime('%d.%m.%Y')
+
+
+def create_shopping_cart(username, ingredients, current_date=None):
     """Создание pdf-файла со списком покупок для загрузки."""
 
     template_path = f'{TEMPLATES_DIR}/shopping_cart_template.html'
@@ -17,7 +27,7 @@ def create_shopping_cart(username, ingredients):
     context = {
         'username': username,
         'ingredients': ingredients,
-        'current_date': datetime.today().strftime('%d.%m.%Y'),
+        'current_date': current_date or get_current_date(),
     }
 
     html_string = render_to_string(template_path, context)
@@ -40,3 +50,114 @@ def get_shopping_cart_ingredients(user):
     ).annotate(total_amount=Sum('amount'))
 
     return ingredients
+
+
+class Echo:
+    """Буфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def iter_shopping_cart_text(ingredients):
+    """Построчная выгрузка списка покупок в текстовом формате."""
+
+    for number, ingredient in enumerate(ingredients.iterator(), start=1):
+        yield (
+            '{number}. {ingredient__name} - {total_amount} '
+            '{ingredient__measurement_unit}\n'
+        ).format(number=number, **ingredient)
+
+
+def iter_shopping_cart_csv(ingredients):
+    """Построчная выгрузка списка покупок в формате csv."""
+
+    writer = csv.writer(Echo())
+    yield writer.writerow(('Ингредиент', 'Количество', 'Единица измерения'))
+    for ingredient in ingredients.iterator():
+        yield writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['total_amount'],
+            ingredient['ingredient__measurement_unit'],
+        ))
+
+
+def get_shopping_cart_hash(username, ingredients, current_date):
+    """Хэш содержимого списка покупок: ключ кэша pdf-файла и ETag."""
+
+    digest = hashlib.sha256(f'{username}\n{current_date}\n'.encode())
+    for ingredient in ingredients:
+        digest.update(
+            '{ingredient__name}\t{ingredient__measurement_unit}\t'
+            '{total_amount}\n'.format(**ingredient).encode()
+        )
+    return digest.hexdigest()
+
+
+def annotate_is_subscribed(queryset, user):
+    """Аннотация queryset пользователей признаком подписки на них."""
+
+    if not user.is_authenticated:
+        return queryset.annotate(
+            is_subscribed=Value(False, output_field=BooleanField())
+        )
+    return queryset.annotate(
+        is_subscribed=Exists(Follow.objects.filter(
+            follower=user,
+            author_id=OuterRef('pk'),
+        ))
+    )
+
+
+def get_following_ids(request):
+    """
+    Множество id авторов, на которых подписан пользователь.
+    Загружается один раз за запрос.
+    """
+
+    if not hasattr(request, '_following_ids'):
+        request._following_ids = set(
+            request.user.follower.values_list('author_id', flat=True)
+        )
+    return request._following_ids
+
+
+def get_limited_recipes(author_ids, limit):
+    """
+    Не более limit последних рецептов каждого автора одним запросом
+    (ROW_NUMBER() OVER (PARTITION BY author)).
+    """
+
+    ranked = Recipe.objects.filter(
+        author_id__in=author_ids
+    ).annotate(
+        author_rank=Window(
+            expression=RowNumber(),
+            partition_by=F('author_id'),
+            order_by=(F('pub_date').desc(), F('id').desc()),
+        )
+    ).order_by().values('id', 'author_rank')
+    sql, params = ranked.query.sql_with_params()
+
+    return Recipe.objects.filter(id__in=RawSQL(
+        f'SELECT id FROM ({sql}) AS ranked WHERE author_rank <= %s',
+        (*params, limit)
+    ))
+
+
+def get_cookable_recipes(ingredients, max_missing, limit):
+    """
+    Рецепты, покрываемые набором ингредиентов: совпадения считаются
+    одним GROUP BY по индексу (ingredient, recipe), недостающие - как
+    разница с ingredients_count рецепта.
+    """
+
+    return Recipe.objects.filter(
+        recipes_ingredients__ingredient_id__in=ingredients
+    ).values('id', 'ingredients_count').annotate(
+        matched=Count('recipes_ingredients')
+    ).annotate(
+        missing=F('ingredients_count') - F('matched')
+    ).filter(
+        missing__lte=max_missing
+    ).order_by('missing', '-matched', '-id')[:limit]
@@ -1,36 +1,74 @@
 from io import BytesIO
 
-from django.http import FileResponse
+from django.core.cache import cache, caches
+from django.http import (FileResponse, HttpResponseNotModified,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
 from rest_framework import permissions, status, viewsets
-from django.db.models import Exists, OuterRef
+from django.db import IntegrityError, transaction
+from django.db.models import (Exists, OuterRef, Prefetch,
+                              prefetch_related_objects)
 
 from users.models import Follow, User
+from .cache import (INGREDIENTS_CACHE, TAGS_CACHE, get_catalog,
+                    get_catalog_response, get_recipes_page_key)
+from .compression import compress_payload, get_compressed_response
+from .constants import RECIPES_CACHE_TIMEOUT
 from .filters import RecipeFilter, IngredientFilter
-from recipes.models import (Ingredient, Favorite, Tags, Recipe, ShoppingList)
-from .paginator import LimitPagination
+from recipes.counters import delete_related, recount_related
+from recipes.feed import get_feed_keys
+from recipes.models import (Ingredient, Favorite, Tags, Recipe,
+                            RecipeIngredient, ShoppingList)
+from .paginator import (KeysetCursorPagination, LimitPagination,
+                        OptionalCursorPaginationMixin,
+                        UsernameCursorPagination)
 from .permissions import IsAuthor, IsAdmin
+from .renderers import CSVRenderer, FastJSONRenderer, PlainTextRenderer
+from .search import ingredient_index
 from .serializers import (TagsSerializer, IngredientsSerializer,
-                          FavoriteSerializer, ShortRecipeSerializer,
-                          FollowSerializer, FollowingSerializer,
-                          UserSerializer, RecipesReadSerializer,
-                          RecipesWriteSerializer, ShoppingListSerializer)
-from .utils import get_shopping_cart_ingredients, create_shopping_cart
-
-
-class UsersViewSet(UserViewSet):
+                          ShortRecipeSerializer, FollowSerializer,
+                          FollowingSerializer, UserSerializer,
+                          CookableRecipesSerializer, RecipeIdsSerializer,
+                          RecipesReadSerializer, RecipesWriteSerializer)
+from .tasks import (JOB_DONE, enqueue_shopping_cart, get_artifact_path,
+                    get_job)
+from .utils import (annotate_is_subscribed, create_shopping_cart,
+                    get_cookable_recipes, get_current_date,
+                    get_limited_recipes, get_shopping_cart_hash,
+                    get_shopping_cart_ingredients,
+                    iter_shopping_cart_csv, iter_shopping_cart_text)
+
+STREAMING_FORMATS = {
+    PlainTextRenderer.format: iter_shopping_cart_text,
+    CSVRenderer.format: iter_shopping_cart_csv,
+}
+
+
+class UsersViewSet(OptionalCursorPaginationMixin, UserViewSet):
 
     queryset = User.objects.all()
     serializer_class = UserSerializer
     pagination_class = LimitPagination
+    cursor_pagination_class = UsernameCursorPagination
     permission_classes = (AllowAny, )
 
+    def get_queryset(self):
+        """Пользователи с признаком подписки текущего пользователя."""
+
+        return annotate_is_subscribed(
+            super().get_queryset(), self.request.user
+        )
+
     @action(methods=['get'], detail=False, url_path='me',
             permission_classes=(IsAuthenticated,),
             serializer_class=UserSerializer)
@@ -47,18 +85,30 @@ class UsersViewSet(UserViewSet):
             permission_classes=(IsAuthenticated,),
             serializer_class=FollowSerializer)
     def follow(self, request, id=None):
-        author = get_object_or_404(User, id=id)
         if request.method == "DELETE":
             del_follow, _ = Follow.objects.filter(
-                author=author,
+                author_id=id,
                 follower=request.user).delete()
             if del_follow:
                 return Response(status=status.HTTP_204_NO_CONTENT)
             return Response(status=status.HTTP_404_NOT_FOUND)
-        serializer = FollowSerializer(data={'author': author.id,
-                                            'follower': request.user.id})
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        author = get_object_or_404(User, id=id)
+        if author == request.user:
+            return Response(
+                {'non_field_errors': ['Нельзя подписаться на самого себя']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            with transaction.atomic():
+                follow = Follow.objects.create(
+                    author=author, follower=request.user
+                )
+        except IntegrityError:
+            return Response(
+                {'non_field_errors': ['Подписка на автора уже оформлена']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = FollowSerializer(follow)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @action(methods=['GET'], detail=False, url_path='subscriptions',
@@ -66,42 +116,123 @@ class UsersViewSet(UserViewSet):
             serializer_class=FollowSerializer)
     def sub_list(self, request):
         user = request.user
-        queryset = User.objects.filter(author__follower=user)
+        queryset = annotate_is_subscribed(
+            User.objects.filter(author__follower=user), user
+        )
         pages = self.paginate_queryset(queryset)
+        prefetch_related_objects(pages, Prefetch(
+            'recipes', queryset=self.get_recipes_queryset(pages)
+        ))
         serializer = FollowingSerializer(pages,
                                          context={'request': request},
                                          many=True)
         return self.get_paginated_response(serializer.data)
 
+    def get_recipes_queryset(self, authors):
+        """
+        Рецепты авторов страницы с учетом параметра recipes_limit.
+        """
+
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        try:
+            recipes_limit = int(recipes_limit)
+        except (TypeError, ValueError):
+            return Recipe.objects.all()
+        if recipes_limit < 0:
+            return Recipe.objects.all()
+        return get_limited_recipes(
+            [author.id for author in authors], recipes_limit
+        )
+
 
 class BaseRecipeMixin:
     @staticmethod
     def add_or_remove_to_favorites_or_cart(
-            request, pk, model_class, serializer_class
+            request, pk, model_class, error_message
     ):
-
-        recipe = get_object_or_404(Recipe, pk=pk)
+        """
+        Добавление/удаление рецепта одним запросом на запись: повторное
+        добавление отсекается уникальным ограничением в БД.
+        """
 
         if request.method == 'DELETE':
             del_count, _ = model_class.objects.filter(
-                user=request.user, recipe=recipe
+                user=request.user, recipe_id=pk
             ).delete()
             if del_count:
                 return Response(status=status.HTTP_204_NO_CONTENT)
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        serializer = serializer_class(
-            data={'user': request.user.id, 'recipe': recipe.id}
-        )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        recipe = get_object_or_404(Recipe, pk=pk)
+        try:
+            with transaction.atomic():
+                model_class.objects.create(user=request.user, recipe=recipe)
+        except IntegrityError:
+            return Response(
+                {'non_field_errors': [error_message]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         action_serializer = ShortRecipeSerializer(recipe)
         return Response(
             action_serializer.data, status=status.HTTP_201_CREATED
         )
 
+    @staticmethod
+    def bulk_add_or_remove(request, model_class):
+        """
+        Пакетное добавление/удаление рецептов одним INSERT или DELETE
+        с отчетом по каждому id.
+        """
+
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['recipes']
+        linked = set(model_class.objects.filter(
+            user=request.user, recipe_id__in=ids
+        ).values_list('recipe_id', flat=True))
+
+        if request.method == 'DELETE':
+            changed = [pk for pk in ids if pk in linked]
+            if changed:
+                delete_related(model_class.objects.filter(
+                    user=request.user, recipe_id__in=changed
+                ))
+            results = {
+                pk: 'removed' if pk in linked else 'not_found' for pk in ids
+            }
+        else:
+            existing = set(Recipe.objects.filter(
+                pk__in=ids
+            ).values_list('pk', flat=True))
+            changed = [
+                pk for pk in ids if pk in existing and pk not in linked
+            ]
+            with transaction.atomic():
+                model_class.objects.bulk_create(
+                    [
+                        model_class(user=request.user, recipe_id=pk)
+                        for pk in changed
+                    ],
+                    ignore_conflicts=True
+                )
+                recount_related(model_class, changed)
+            results = {
+                pk: (
+                    'exists' if pk in linked
+                    else 'added' if pk in existing
+                    else 'not_found'
+                )
+                for pk in ids
+            }
+
+        return Response(
+            [{'id': pk, 'status': result} for pk, result in results.items()],
+            status=status.HTTP_200_OK
+        )
+
 
-class RecipesViewSet(viewsets.ModelViewSet, BaseRecipeMixin):
+class RecipesViewSet(OptionalCursorPaginationMixin, viewsets.ModelViewSet,
+                     BaseRecipeMixin):
     """Вьюсет для создания объектов класса Recipe."""
 
     serializer_class = RecipesWriteSerializer
@@ -117,40 +248,143 @@ class RecipesViewSet(viewsets.ModelViewSet, BaseRecipeMixin):
         с аннотациями и подзапросами.
         """
 
-        if self.request.user.is_authenticated:
-            queryset = Recipe.objects.annotate(
-                is_favorited=Exists(Favorite.objects.filter(
-                    user=self.request.user,
-                    recipe_id=OuterRef('pk'),
-                )),
-                is_in_shopping_cart=Exists(ShoppingList.objects.filter(
-                    user=self.request.user,
-                    recipe_id=OuterRef('pk'),
-                ))
-            ).select_related('author')
+        queryset = Recipe.objects.defer('search_vector').prefetch_related(
+            Prefetch(
+                'recipes_ingredients',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                )
+            ),
+            'tags',
+        )
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.select_related('author')
+
+        return queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user,
+                recipe_id=OuterRef('pk'),
+            )),
+            is_in_shopping_cart=Exists(ShoppingList.objects.filter(
+                user=user,
+                recipe_id=OuterRef('pk'),
+            ))
+        ).prefetch_related(
+            Prefetch(
+                'author',
+                queryset=annotate_is_subscribed(User.objects.all(), user)
+            ),
+        )
 
-            return queryset
+    def list(self, request, *args, **kwargs):
+        """
+        Лента рецептов. Страницы для анонимных пользователей
+        отдаются из общего кэша уже отрендеренными и сжатыми.
+        """
+
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+
+        if request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+
+        cache_key = get_recipes_page_key(request)
+        payload = cache.get(cache_key)
+        if payload is not None:
+            return get_compressed_response(request, payload)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        payload = compress_payload(
+            request.accepted_renderer.render(response.data)
+        )
+        cache.set(cache_key, payload, RECIPES_CACHE_TIMEOUT)
+        return get_compressed_response(request, payload)
+
+    def cursor_pagination_allowed(self):
+        """
+        Результаты поиска упорядочены по релевантности, а курсор
+        требует порядка по дате: при поиске выдача постраничная.
+        """
+
+        return not self.request.query_params.get('search', '').strip()
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @action(detail=False, methods=['GET'], url_path='feed', url_name='feed',
+            permission_classes=(IsAuthenticated,))
+    def feed(self, request):
+        """
+        Лента рецептов авторов, на которых подписан пользователь:
+        страница ключей строится по FeedEntry и рецептам авторов
+        с большим числом подписчиков, затем загружаются сами рецепты.
+        """
+
+        recipes = None
+        if any(
+            request.query_params.get(name)
+            for name in RecipeFilter.base_filters
+        ):
+            recipes = self.filter_queryset(self.get_queryset())
+        paginator = KeysetCursorPagination()
+        keys = paginator.paginate_keys(
+            lambda after, limit: get_feed_keys(
+                request.user, limit, after, recipes
+            ),
+            request
+        )
+        loaded = self.get_queryset().in_bulk(
+            [recipe_id for _, recipe_id in keys]
+        )
+        serializer = RecipesReadSerializer(
+            [loaded[recipe_id] for _, recipe_id in keys
+             if recipe_id in loaded],
+            many=True,
+            context={'request': request}
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['GET'], url_path='cookable',
+            url_name='cookable')
+    def cookable(self, request):
+        """
+        Что можно приготовить: рецепты по имеющимся ингредиентам,
+        сначала полностью покрытые, затем с недостающими.
+        """
+
+        params = CookableRecipesSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        ranked = get_cookable_recipes(**params.validated_data)
+        recipes = self.get_queryset().in_bulk(
+            [item['id'] for item in ranked]
+        )
+        ranked = [item for item in ranked if item['id'] in recipes]
+        serializer = RecipesReadSerializer(
+            [recipes[item['id']] for item in ranked],
+            many=True,
+            context={'request': request}
+        )
+        return Response([
+            {
+                **recipe,
+                'matched_ingredients': item['matched'],
+                'missing_ingredients': item['missing'],
+                'coverage': round(item['matched'] / max(
+                    item['ingredients_count'], item['matched']
+                ), 2),
+            }
+            for recipe, item in zip(serializer.data, ranked)
+        ])
+
     @action(methods=['POST', 'DELETE'], detail=True, url_path='favorite',
-            permission_classes=(IsAuthenticated,),
-            serializer_class=FavoriteSerializer)
+            permission_classes=(IsAuthenticated,))
     def favorite(self, request, pk):
-        recipe = get_object_or_404(Recipe, pk=pk)
-        if request.method == 'DELETE':
-            del_favorite, _ = Favorite.objects.filter(user=request.user,
-                                                      recipe=recipe).delete()
-            if del_favorite:
-                return Response(status=status.HTTP_204_NO_CONTENT)
-            return Response(status=status.HTTP_404_NOT_FOUND)
-        serializer = FavoriteSerializer(
-            data={'user': request.user.id, 'recipe': recipe.id})
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        action_serializer = ShortRecipeSerializer(recipe)
-        return Response(action_serializer.data, status=status.HTTP_201_CREATED)
+        return self.add_or_remove_to_favorites_or_cart(
+            request, pk, Favorite, 'Рецепт уже в избранном'
+        )
 
     @action(
         detail=True, methods=['POST', 'DELETE'], url_path='shopping_cart',
@@ -164,31 +398,182 @@ class RecipesViewSet(viewsets.ModelViewSet, BaseRecipeMixin):
         """
 
         return self.add_or_remove_to_favorites_or_cart(
-            request, pk, ShoppingList, ShoppingListSerializer
+            request, pk, ShoppingList, 'Рецепт уже в списке покупок'
+        )
+
+    @action(
+        detail=False, methods=['POST', 'DELETE'], url_path='favorite',
+        url_name='favorite_bulk',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def bulk_favorite(self, request):
+        """Пакетное добавление/удаление рецептов в избранное."""
+
+        return self.bulk_add_or_remove(request, Favorite)
+
+    @action(
+        detail=False, methods=['POST', 'DELETE'], url_path='shopping_cart',
+        url_name='shopping_cart_bulk',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def bulk_shopping_cart(self, request):
+        """Пакетное добавление/удаление рецептов в список покупок."""
+
+        return self.bulk_add_or_remove(request, ShoppingList)
+
+    @action(
+        detail=False, methods=['DELETE'], url_path='shopping_cart/clear',
+        url_name='shopping_cart_clear',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def clear_shopping_cart(self, request):
+        """Очистка списка покупок."""
+
+        deleted = delete_related(
+            ShoppingList.objects.filter(user=request.user)
         )
+        if deleted:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(status=status.HTTP_404_NOT_FOUND)
 
     @action(
         detail=False, methods=['GET'], url_path='download_shopping_cart',
         url_name='download_shopping_cart',
         permission_classes=(permissions.IsAuthenticated,),
+        renderer_classes=(
+            *api_settings.DEFAULT_RENDERER_CLASSES,
+            PlainTextRenderer,
+            CSVRenderer,
+        ),
     )
     def download_shopping_cart(self, request):
-        """Скачивание списка покупок, если он есть."""
+        """
+        Скачивание списка покупок, если он есть.
+        Форматы txt и csv (?format= или Accept) отдаются потоком.
+        """
+
+        if request.accepted_renderer.format in STREAMING_FORMATS:
+            return self.stream_shopping_cart(request.accepted_renderer)
 
-        if not request.user.shopping_list_recipes.exists():
+        username = request.user.username
+        ingredients = list(get_shopping_cart_ingredients(request.user))
+        if not ingredients:
             return Response({'errors': 'Корзина пуста'},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        username = request.user.username
-        ingredients = get_shopping_cart_ingredients(request.user)
-        pdf_file_data = create_shopping_cart(username, ingredients)
+        current_date = get_current_date()
+        if request.query_params.get('async') in ('1', 'true'):
+            return self.enqueue_shopping_cart(ingredients, current_date)
+
+        cart_hash = get_shopping_cart_hash(
+            username, ingredients, current_date
+        )
+        etag = quote_etag(cart_hash)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        shopping_cart_cache = caches['shopping_cart']
+        pdf_file_data = shopping_cart_cache.get(cart_hash)
+        if pdf_file_data is None:
+            pdf_file_data = create_shopping_cart(
+                username, ingredients, current_date
+            )
+            shopping_cart_cache.set(cart_hash, pdf_file_data)
         response = FileResponse(BytesIO(pdf_file_data),
                                 content_type='application/pdf')
         response[
             'Content-Disposition'
         ] = f'attachment; filename="{username}_download_list.pdf"'
+        response['ETag'] = etag
         return response
 
+    def stream_shopping_cart(self, renderer):
+        """Потоковая выгрузка списка покупок без сборки документа."""
+
+        user = self.request.user
+        if not user.shopping_list_recipes.exists():
+            return Response({'errors': 'Корзина пуста'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        rows = STREAMING_FORMATS[renderer.format](
+            get_shopping_cart_ingredients(user)
+        )
+        response = StreamingHttpResponse(
+            (row.encode(renderer.charset) for row in rows),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{user.username}_download_list.'
+            f'{renderer.format}"'
+        )
+        return response
+
+    def enqueue_shopping_cart(self, ingredients, current_date):
+        """Постановка генерации pdf-файла в очередь."""
+
+        job = enqueue_shopping_cart(
+            self.request.user, ingredients, current_date
+        )
+        if job is None:
+            return Response(
+                {'errors': 'Слишком много задач, повторите позже'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+        response = Response(
+            {'id': job['id'], 'status': job['status']},
+            status=status.HTTP_202_ACCEPTED
+        )
+        response['Location'] = reverse(
+            'recipes-shopping_cart_job', args=(job['id'],),
+            request=self.request
+        )
+        return response
+
+    @action(
+        detail=False, methods=['GET'],
+        url_path=r'shopping_cart_jobs/(?P<job_id>[0-9a-f]{32})',
+        url_name='shopping_cart_job',
+        permission_classes=(permissions.IsAuthenticated,),
+    )
+    def shopping_cart_job(self, request, job_id):
+        """Статус задачи генерации списка покупок."""
+
+        job = get_job(job_id, request.user)
+        if job is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        data = {'id': job['id'], 'status': job['status']}
+        if job['status'] == JOB_DONE:
+            data['download_url'] = reverse(
+                'recipes-shopping_cart_job_download', args=(job_id,),
+                request=request
+            )
+        return Response(data)
+
+    @action(
+        detail=False, methods=['GET'],
+        url_path=r'shopping_cart_jobs/(?P<job_id>[0-9a-f]{32})/download',
+        url_name='shopping_cart_job_download',
+        permission_classes=(permissions.IsAuthenticated,),
+    )
+    def download_shopping_cart_job(self, request, job_id):
+        """Скачивание готового списка покупок."""
+
+        job = get_job(job_id, request.user)
+        if job is None or job['status'] != JOB_DONE:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        try:
+            artifact = open(get_artifact_path(job_id), 'rb')
+        except FileNotFoundError:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(
+            artifact,
+            as_attachment=True,
+            filename=job['filename'],
+            content_type='application/pdf'
+        )
+
     def get_serializer_class(self):
         """Выбор сериализатора для чтения рецепта и редактирования."""
 
@@ -197,19 +582,60 @@ class RecipesViewSet(viewsets.ModelViewSet, BaseRecipeMixin):
         return RecipesWriteSerializer
 
 
-class TagsViewSet(viewsets.ReadOnlyModelViewSet):
+class CatalogMixin:
+    """
+    Список справочника целиком отдается из кэша в виде
+    готового (и сжатого) JSON с ETag и Last-Modified.
+    """
+
+    catalog_name = None
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        return get_catalog_response(
+            request, get_catalog(self.catalog_name, self.render_catalog)
+        )
+
+    def render_catalog(self):
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return FastJSONRenderer().render(serializer.data)
+
+
+class TagsViewSet(CatalogMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tags.objects.all()
     serializer_class = TagsSerializer
+    catalog_name = TAGS_CACHE
 
 
-class IngredientsViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientsViewSet(CatalogMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientsSerializer
+    catalog_name = INGREDIENTS_CACHE
     permission_classes = (permissions.AllowAny,)
     filter_backends = (SearchFilter, DjangoFilterBackend,)
     filterset_class = IngredientFilter
     search_fields = ('name',)
 
+    def list(self, request, *args, **kwargs):
+        """
+        Поиск по параметру name выполняется по индексу в памяти:
+        сначала совпадения по началу названия, затем по подстроке.
+        """
+
+        name = request.query_params.get('name')
+        if not name:
+            return super().list(request, *args, **kwargs)
+        try:
+            limit = int(request.query_params['limit'])
+        except (KeyError, ValueError):
+            limit = None
+        if limit is not None and limit < 1:
+            raise ValidationError(
+                {'limit': ['Значение должно быть больше или равно 1.']}
+            )
+        return Response(ingredient_index.search(name, limit))
+
 
 class FollowViewSet(viewsets.ModelViewSet):
     queryset = Follow.objects.all()
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
 
-from recipes.models import (Tags, RecipeIngredient, Recipe)
+from recipes.counters import delete_related, recount_ingredients
+from recipes.models import (Tags, Ingredient, RecipeIngredient, Recipe)
 
 
 @admin.register(Tags)
@@ -15,22 +16,54 @@ class TagsAdmin(admin.ModelAdmin):
     empty_value_display = '-Пусто-'
 
 
+@admin.register(Ingredient)
+class IngredientAdmin(admin.ModelAdmin):
+
+    list_display = ('id', 'name', 'measurement_unit')
+    search_fields = ('name',)
+    ordering = ('name',)
+    empty_value_display = '-Пусто-'
+
+
 @admin.register(RecipeIngredient)
 class RecipeIngredientAdmin(admin.ModelAdmin):
 
     list_display = ('id', 'recipe', 'ingredient')
-    search_fields = ('recipe', 'ingredient')
+    list_select_related = ('recipe', 'ingredient')
+    search_fields = ('recipe__name', 'ingredient__name')
+    raw_id_fields = ('recipe',)
+    autocomplete_fields = ('ingredient',)
     ordering = ('id',)
     empty_value_display = '-Пусто-'
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        recount_ingredients(obj.recipe_id, form.initial.get('recipe'))
+
+    def delete_queryset(self, request, queryset):
+        delete_related(queryset)
+
 
 class IngredientsInLine(admin.TabularInline):
     model = Recipe.ingredients.through
+    autocomplete_fields = ('ingredient',)
+    extra = 0
 
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
 
+    def get_queryset(self, request):
+        """Тэги и ингредиенты списка загружаются двумя запросами."""
+
+        return super().get_queryset(request).prefetch_related(
+            'tags', 'ingredients'
+        )
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        recount_ingredients(form.instance.pk)
+
     def show_image(self, object):
         if object.image:
             return format_html(
@@ -53,17 +86,18 @@ class RecipeAdmin(admin.ModelAdmin):
 
     show_ingredients.short_description = 'Используемые ингредиенты'
 
-    def show_favorite(self, object):
-        return object.favorites.all().count()
-
-    show_favorite.short_description = 'В избранном'
-
     list_display = (
         'id', 'name', 'author', 'show_tags', 'show_ingredients',
-        'text', 'cooking_time', 'pub_date', 'show_image', 'show_favorite'
+        'text', 'cooking_time', 'pub_date', 'show_image', 'favorites_count',
+        'shopping_lists_count'
+    )
+    readonly_fields = (
+        'favorites_count', 'shopping_lists_count', 'ingredients_count'
     )
+    list_select_related = ('author',)
     search_fields = ('author__username', 'name')
     list_filter = ('author__username', 'name', 'tags')
+    autocomplete_fields = ('author',)
 
     ordering = ('id',)
     empty_value_display = '-Пусто-'
@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import Favorite, Recipe, RecipeIngredient, ShoppingList
+from users.models import Follow, User
+
+
+def change_counter(model, pk, field, delta):
+    """Атомарное изменение счетчика одним UPDATE."""
+
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+
+
+def count_subquery(model, field):
+    """Подзапрос с количеством строк model, ссылающихся на объект."""
+
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        Value(0)
+    )
+
+
+COUNTED_RELATIONS = {
+    Recipe: (User, 'author_id', 'recipes_count'),
+    Follow: (User, 'author_id', 'followers_count'),
+    Favorite: (Recipe, 'recipe_id', 'favorites_count'),
+    ShoppingList: (Recipe, 'recipe_id', 'shopping_lists_count'),
+    RecipeIngredient: (Recipe, 'recipe_id', 'ingredients_count'),
+}
+
+COUNTERS = (
+    (User, 'recipes_count', lambda: count_subquery(Recipe, 'author')),
+    (User, 'followers_count', lambda: count_subquery(Follow, 'author')),
+    (Recipe, 'favorites_count', lambda: count_subquery(Favorite, 'recipe')),
+    (Recipe, 'shopping_lists_count',
+     lambda: count_subquery(ShoppingList, 'recipe')),
+    (Recipe, 'ingredients_count',
+     lambda: count_subquery(RecipeIngredient, 'recipe')),
+)
+
+
+def recount_ingredients(*recipe_ids):
+    """Пересчет количества ингредиентов рецептов одним UPDATE."""
+
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        ingredients_count=count_subquery(RecipeIngredient, 'recipe')
+    )
+
+
+def recount_related(relation, pks):
+    """
+    Точный пересчет счетчика связей relation у объектов pks одним
+    UPDATE: результат не зависит от пропущенных или параллельных вставок.
+    """
+
+    model, field, counter = COUNTED_RELATIONS[relation]
+    model.objects.filter(pk__in=pks).update(
+        **{counter: count_subquery(relation, field)}
+    )
+
+
+def delete_related(queryset):
+    """
+    Удаление связей одним DELETE без post_delete на каждую строку
+    и пересчет затронутых счетчиков в той же транзакции.
+    """
+
+    relation = queryset.model
+    _, field, _ = COUNTED_RELATIONS[relation]
+    with transaction.atomic(using=queryset.db):
+        pks = set(queryset.values_list(field, flat=True))
+        # Связи без зависимых объектов: каскад и сигналы не нужны.
+        deleted = queryset._raw_delete(queryset.db)
+        if pks:
+            recount_related(relation, pks)
+    return deleted
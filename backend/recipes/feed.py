@@ -0,0 +1,174 @@
+from django.conf import settings
+from django.db.models import Count, F, Q, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+
+from recipes.models import FeedEntry, Recipe
+from users.models import Follow, User
+
+
+def is_fanned_out(author_id):
+    """
+    Рецепты автора раскладываются по лентам при публикации, если
+    у него не слишком много подписчиков; иначе они читаются при запросе
+    ленты. Режим хранится у автора и меняется только вместе с лентами.
+    """
+
+    return User.objects.filter(pk=author_id, feed_fanout=True).exists()
+
+
+def get_feed_recipes(author_id):
+    return list(Recipe.objects.filter(
+        author_id=author_id
+    ).order_by('-pub_date', '-id').values_list(
+        'id', 'pub_date'
+    )[:settings.FEED_MAX_LENGTH])
+
+
+def add_to_feeds(follower_ids, author_id, recipes):
+    """Запись рецептов автора (id, pub_date) в ленты подписчиков."""
+
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=follower_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                pub_date=pub_date
+            )
+            for follower_id in follower_ids
+            for recipe_id, pub_date in recipes
+        ),
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+    trim_feeds(follower_ids)
+
+
+def fan_out_recipe(recipe):
+    """Запись нового рецепта в ленты подписчиков автора."""
+
+    if not is_fanned_out(recipe.author_id):
+        return
+    add_to_feeds(
+        list(Follow.objects.filter(
+            author_id=recipe.author_id
+        ).values_list('follower_id', flat=True)),
+        recipe.author_id,
+        [(recipe.pk, recipe.pub_date)]
+    )
+
+
+def backfill_feed(follow):
+    """
+    Последние рецепты автора в ленту нового подписчика. Если подписчиков
+    стало больше порога, автор переходит на чтение при запросе ленты.
+    """
+
+    switched = User.objects.filter(
+        pk=follow.author_id,
+        feed_fanout=True,
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).update(feed_fanout=False)
+    if switched:
+        FeedEntry.objects.filter(author_id=follow.author_id).delete()
+    elif is_fanned_out(follow.author_id):
+        add_to_feeds(
+            [follow.follower_id],
+            follow.author_id,
+            get_feed_recipes(follow.author_id)
+        )
+
+
+def remove_from_feed(follow):
+    """
+    Удаление рецептов автора из ленты отписавшегося пользователя.
+    Когда подписчиков становится заметно меньше порога, рецепты автора
+    раскладываются по лентам всех оставшихся подписчиков; запас в 10%
+    не дает переключать режим при каждой подписке и отписке.
+    """
+
+    FeedEntry.objects.filter(
+        user_id=follow.follower_id, author_id=follow.author_id
+    ).delete()
+    threshold = settings.FEED_FANOUT_MAX_FOLLOWERS
+    switched = User.objects.filter(
+        pk=follow.author_id,
+        feed_fanout=False,
+        followers_count__lte=threshold - threshold // 10
+    ).update(feed_fanout=True)
+    if switched:
+        add_to_feeds(
+            list(Follow.objects.filter(
+                author_id=follow.author_id
+            ).values_list('follower_id', flat=True)),
+            follow.author_id,
+            get_feed_recipes(follow.author_id)
+        )
+
+
+def trim_feeds(user_ids):
+    """
+    Обрезка лент до FEED_MAX_LENGTH последних записей. Обрезаются только
+    ленты, переросшие предел на 10%, чтобы не удалять по одной записи
+    при каждой публикации.
+    """
+
+    limit = settings.FEED_MAX_LENGTH
+    overflowing = list(FeedEntry.objects.filter(
+        user_id__in=user_ids
+    ).order_by().values('user_id').annotate(
+        total=Count('pk')
+    ).filter(total__gt=limit + limit // 10).values_list('user_id', flat=True))
+    if not overflowing:
+        return
+
+    ranked = FeedEntry.objects.filter(
+        user_id__in=overflowing
+    ).annotate(
+        position=Window(
+            expression=RowNumber(),
+            partition_by=F('user_id'),
+            order_by=(F('pub_date').desc(), F('recipe_id').desc()),
+        )
+    ).order_by().values('id', 'position')
+    sql, params = ranked.query.sql_with_params()
+    FeedEntry.objects.filter(id__in=RawSQL(
+        f'SELECT id FROM ({sql}) AS ranked WHERE position > %s',
+        (*params, limit)
+    )).delete()
+
+
+def get_feed_keys(user, limit, after=None, recipes=None):
+    """
+    Ключи (pub_date, id) очередной страницы ленты после ключа after.
+    Разложенная часть читается из FeedEntry по индексу
+    (user, -pub_date, -recipe), рецепты авторов с большим числом
+    подписчиков - по индексу (author, -pub_date, -id); обе выборки
+    ограничены limit и сливаются по ключу. recipes сужает ленту
+    отфильтрованным queryset рецептов.
+    """
+
+    entries = FeedEntry.objects.filter(user=user)
+    pulled = Recipe.objects.filter(author_id__in=Follow.objects.filter(
+        follower=user, author__feed_fanout=False
+    ).values('author_id'))
+    if recipes is not None:
+        entries = entries.filter(recipe_id__in=recipes.values('pk'))
+        pulled = pulled.filter(pk__in=recipes.values('pk'))
+    if after is not None:
+        pub_date, recipe_id = after
+        entries = entries.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, recipe_id__lt=recipe_id)
+        )
+        pulled = pulled.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=recipe_id)
+        )
+    keys = set(entries.order_by('-pub_date', '-recipe_id').values_list(
+        'pub_date', 'recipe_id'
+    )[:limit])
+    keys.update(pulled.order_by('-pub_date', '-id').values_list(
+        'pub_date', 'id'
+    )[:limit])
+    return sorted(keys, reverse=True)[:limit]
@@ -0,0 +1,149 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from PIL import Image, ImageOps
+
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = {
+    'thumbnail': 160,
+    'card': 480,
+    'full': 1280,
+}
+VARIANT_FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+VARIANT_QUALITY = 82
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_VARIANTS_WORKERS
+        )
+    return _executor
+
+
+def get_variant_name(name, variant, extension):
+    """Имя файла варианта изображения рядом с оригиналом."""
+
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return f'{directory}/variants/{stem}_{variant}.{extension}'
+
+
+def get_variant_names(name):
+    return {
+        variant: {
+            extension: get_variant_name(name, variant, extension)
+            for extension in VARIANT_FORMATS
+        }
+        for variant in VARIANTS
+    }
+
+
+def strip_metadata(image_file):
+    """
+    Пересохранение загруженного изображения без EXIF и прочих
+    метаданных (ориентация из EXIF применяется к пикселям).
+    """
+
+    image = Image.open(image_file)
+    if image.width * image.height > settings.RECIPE_IMAGE_MAX_PIXELS:
+        raise ValueError('Слишком большое разрешение изображения')
+    if getattr(image, 'is_animated', False):
+        image_file.seek(0)
+        return image_file
+
+    image_format = image.format
+    image = ImageOps.exif_transpose(image)
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, quality=95)
+    return ContentFile(buffer.getvalue(), name=image_file.name)
+
+
+def mark_variants_ready(name):
+    """Отметка рецептов с изображением name: варианты созданы."""
+
+    Recipe.objects.filter(image=name).exclude(
+        image_variants_source=name
+    ).update(image_variants_source=name)
+
+
+def generate_variants(name, force=False):
+    """
+    Создание уменьшенных копий изображения в форматах WebP и JPEG.
+    После записи всех файлов рецепты с этим изображением помечаются,
+    и API начинает отдавать ссылки на варианты.
+    """
+
+    names = get_variant_names(name)
+    if not force and all(
+        default_storage.exists(variant_name)
+        for variant in names.values()
+        for variant_name in variant.values()
+    ):
+        mark_variants_ready(name)
+        return
+
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        image.load()
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    else:
+        image = image.convert('RGB')
+
+    for variant, size in VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        for extension, image_format in VARIANT_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(
+                buffer, format=image_format, quality=VARIANT_QUALITY
+            )
+            variant_name = names[variant][extension]
+            if default_storage.exists(variant_name):
+                default_storage.delete(variant_name)
+            default_storage.save(variant_name, ContentFile(buffer.getvalue()))
+    mark_variants_ready(name)
+
+
+def generate_variants_safe(name):
+    """
+    Задача пула потоков. Django закрывает соединения с БД только
+    в потоках запросов, поэтому здесь они закрываются явно: иначе
+    после перезапуска БД поток продолжал бы работать с разорванным
+    соединением.
+    """
+
+    close_old_connections()
+    try:
+        generate_variants(name)
+    except Exception:
+        logger.exception('Не удалось создать варианты изображения %s', name)
+    finally:
+        connection.close()
+
+
+def schedule_variants(name):
+    """Генерация вариантов в пуле потоков после фиксации транзакции."""
+
+    transaction.on_commit(
+        lambda: get_executor().submit(generate_variants_safe, name)
+    )
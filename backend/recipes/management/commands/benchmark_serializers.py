@@ -0,0 +1,69 @@
+from timeit import timeit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.renderers import FastJSONRenderer
+from api.serializers import RecipesReadSerializer
+from api.views import RecipesViewSet
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнение времени сериализации и рендеринга списка рецептов: '
+        'облегченный список против сериализации по одному объекту'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes', type=int, default=100,
+            help='Количество рецептов в списке'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Количество повторов каждого замера'
+        )
+        parser.add_argument(
+            '--user', help='Имя пользователя для авторизованного запроса'
+        )
+
+    def handle(self, *args, **options):
+        request = Request(APIRequestFactory().get(
+            '/api/recipes/', HTTP_HOST=settings.ALLOWED_HOSTS[0]
+        ))
+        request.user = AnonymousUser()
+        if options['user']:
+            try:
+                request.user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError('Пользователь не найден')
+        view = RecipesViewSet(request=request, action='list')
+        recipes = list(
+            view.get_queryset().order_by('-pub_date')[:options['recipes']]
+        )
+        if not recipes:
+            raise CommandError('Нет рецептов для замера')
+        context = {'request': request}
+        data = RecipesReadSerializer(recipes, many=True, context=context).data
+
+        repeat = options['repeat']
+        results = (
+            ('Сериализация по объектам', lambda: [
+                RecipesReadSerializer(recipe, context=context).data
+                for recipe in recipes
+            ]),
+            ('Облегченный список', lambda: RecipesReadSerializer(
+                recipes, many=True, context=context
+            ).data),
+            ('JSONRenderer', lambda: JSONRenderer().render(data)),
+            ('FastJSONRenderer', lambda: FastJSONRenderer().render(data)),
+        )
+        self.stdout.write(f'Рецептов: {len(recipes)}, повторов: {repeat}')
+        for title, function in results:
+            elapsed = timeit(function, number=repeat) / repeat * 1000
+            self.stdout.write(f'{title}: {elapsed:.2f} мс')
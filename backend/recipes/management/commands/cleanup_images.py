@@ -0,0 +1,105 @@
+import posixpath
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from recipes.images import get_variant_names
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Удаление изображений, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Количество файлов, удаляемых за один проход'
+        )
+        parser.add_argument(
+            '--grace-minutes', type=int, default=60,
+            help='Не удалять файлы моложе указанного возраста'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать количество неиспользуемых файлов'
+        )
+
+    def handle(self, *args, **options):
+        storage = Recipe._meta.get_field('image').storage
+        upload_to = Recipe._meta.get_field('image').upload_to.rstrip('/')
+
+        referenced = self.with_variants(
+            Recipe.objects.values_list('image', flat=True).iterator()
+        )
+
+        threshold = timezone.now() - timedelta(
+            minutes=options['grace_minutes']
+        )
+        orphans = [
+            name for name in self.list_files(storage, upload_to)
+            if name not in referenced
+            and storage.get_modified_time(name) < threshold
+        ]
+
+        deleted = 0
+        if not options['dry_run']:
+            batch_size = options['batch_size']
+            for start in range(0, len(orphans), batch_size):
+                batch = orphans[start:start + batch_size]
+                in_use = self.get_referenced(batch)
+                for name in batch:
+                    if (name in in_use
+                            or storage.get_modified_time(name) >= threshold):
+                        continue
+                    storage.delete(name)
+                    deleted += 1
+                self.stdout.write(f'Удалено {deleted} из {len(orphans)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Неиспользуемых файлов: {len(orphans)}, удалено: {deleted}'
+        ))
+
+    @staticmethod
+    def with_variants(names):
+        referenced = set()
+        for name in names:
+            referenced.add(name)
+            for variant in get_variant_names(name).values():
+                referenced.update(variant.values())
+        return referenced
+
+    def get_referenced(self, batch):
+        """
+        Повторная проверка пакета перед удалением: файл мог снова
+        стать используемым после построения общего списка.
+        """
+
+        prefixes = set()
+        for name in batch:
+            directory, filename = posixpath.split(name)
+            stem = posixpath.splitext(filename)[0]
+            if posixpath.basename(directory) == 'variants':
+                directory = posixpath.dirname(directory)
+                stem = stem.rsplit('_', 1)[0]
+            prefixes.add(posixpath.join(directory, f'{stem}.'))
+        condition = reduce(or_, (
+            Q(image__startswith=prefix) for prefix in prefixes
+        ))
+        return self.with_variants(
+            Recipe.objects.filter(condition).values_list('image', flat=True)
+        )
+
+    def list_files(self, storage, directory):
+        if not storage.exists(directory):
+            return
+        directories, files = storage.listdir(directory)
+        for filename in files:
+            yield posixpath.join(directory, filename)
+        for subdirectory in directories:
+            yield from self.list_files(
+                storage, posixpath.join(directory, subdirectory)
+            )
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from recipes.images import generate_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создание вариантов изображений для рецептов, у которых их нет'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Количество изображений, обрабатываемых за один проход'
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать варианты для всех изображений'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['force']:
+            recipes = recipes.exclude(image_variants_source=F('image'))
+        names = list(
+            recipes.order_by('image').values_list(
+                'image', flat=True
+            ).distinct()
+        )
+
+        done = failed = 0
+        batch_size = options['batch_size']
+        for start in range(0, len(names), batch_size):
+            for name in names[start:start + batch_size]:
+                try:
+                    generate_variants(name, force=options['force'])
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                else:
+                    done += 1
+            self.stdout.write(f'Обработано {done + failed} из {len(names)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано вариантов: {done}, ошибок: {failed}'
+        ))
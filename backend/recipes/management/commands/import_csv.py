@@ -1,16 +1,96 @@
-from django.core.management.base import BaseCommand
+import csv
+import json
+import time
+from pathlib import Path
 
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.cache import INGREDIENTS_CACHE, RECIPES_CACHE, bump_version
 from recipes.models import Ingredient
 
 
 class Command(BaseCommand):
-    help = 'Импорт данных в таблицу Ингредиентов'
+    help = 'Импорт данных в таблицу Ингредиентов (csv или json)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            default=settings.BASE_DIR / 'data' / 'ingredients.csv',
+            help='Путь к файлу ingredients.csv или ingredients.json'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество записей в одном INSERT'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Проверить файл без сохранения в базу'
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть больше 0')
+
+        started = time.monotonic()
+        existing = set(
+            Ingredient.objects.values_list('name', 'measurement_unit')
+        )
+        created = skipped = 0
+        batch = []
+
+        with transaction.atomic():
+            for row in self.read_rows(path):
+                if row in existing:
+                    skipped += 1
+                    continue
+                existing.add(row)
+                batch.append(
+                    Ingredient(name=row[0], measurement_unit=row[1])
+                )
+                if len(batch) >= batch_size:
+                    created += self.save_batch(batch)
+                    batch = []
+                    self.stdout.write(
+                        f'Добавлено {created} '
+                        f'({time.monotonic() - started:.2f} с)'
+                    )
+            created += self.save_batch(batch)
+            if options['dry_run']:
+                transaction.set_rollback(True)
+
+        if not options['dry_run'] and created:
+            bump_version(INGREDIENTS_CACHE, RECIPES_CACHE)
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Проверено" if options["dry_run"] else "Импортировано"}: '
+            f'{created} новых, {skipped} уже в базе, '
+            f'за {time.monotonic() - started:.2f} с'
+        ))
+
+    @staticmethod
+    def save_batch(batch):
+        Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+        return len(batch)
 
-    def handle(self, *args, **kwargs):
-        with open('data/ingredients.csv', encoding="utf-8") as f:
-            for line in f:
-                ingredient_csv = line.replace('\n', '').split(',')
+    def read_rows(self, path):
+        """Пары (название, единица измерения) из файла."""
 
-                ingredient = Ingredient(name=ingredient_csv[0],
-                                        measurement_unit=ingredient_csv[1])
-                ingredient.save()
+        if not path.exists():
+            raise CommandError(f'Файл {path} не найден')
+        with open(path, encoding='utf-8') as file:
+            if path.suffix == '.json':
+                rows = (
+                    (item['name'], item['measurement_unit'])
+                    for item in json.load(file)
+                )
+            else:
+                rows = csv.reader(file)
+            for row in rows:
+                if len(row) < 2:
+                    continue
+                name, measurement_unit = row[0].strip(), row[1].strip()
+                if name and measurement_unit:
+                    yield name, measurement_unit
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from recipes.counters import COUNTERS
+
+
+class Command(BaseCommand):
+    help = 'Пересчет счетчиков рецептов, избранного и подписчиков'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать количество расхождений'
+        )
+
+    def handle(self, *args, **options):
+        for model, field, expression in COUNTERS:
+            with transaction.atomic():
+                drifted = model.objects.annotate(
+                    actual=expression()
+                ).exclude(**{field: F('actual')})
+                count = drifted.count()
+                if count and not options['dry_run']:
+                    model.objects.filter(
+                        pk__in=drifted.values('pk')
+                    ).update(**{field: expression()})
+            self.stdout.write(
+                f'{model._meta.label}.{field}: расхождений {count}'
+            )
+        self.stdout.write(self.style.SUCCESS('Готово'))
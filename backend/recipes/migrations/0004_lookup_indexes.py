@@ -0,0 +1,97 @@
+# Generated by Django 3.2.3 on 2026-10-18 18:10
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def delete_duplicates(model, fields):
+    duplicates = model.objects.order_by().values(*fields).annotate(
+        keep_id=Min('id'), total=Count('id')
+    ).filter(total__gt=1)
+    for duplicate in duplicates:
+        model.objects.filter(
+            **{field: duplicate[field] for field in fields}
+        ).exclude(id=duplicate['keep_id']).delete()
+
+
+def merge_ingredient_duplicates(model):
+    """
+    Строки одного ингредиента в рецепте (в том числе перенесенные
+    с объединенных дубликатов ингредиентов) сливаются в одну
+    с суммарным количеством.
+    """
+
+    duplicates = model.objects.order_by().values(
+        'recipe', 'ingredient'
+    ).annotate(
+        keep_id=Min('id'), total=Count('id'), amount_sum=Sum('amount')
+    ).filter(total__gt=1)
+    for duplicate in duplicates:
+        model.objects.filter(id=duplicate['keep_id']).update(
+            amount=duplicate['amount_sum']
+        )
+        model.objects.filter(
+            recipe=duplicate['recipe'], ingredient=duplicate['ingredient']
+        ).exclude(id=duplicate['keep_id']).delete()
+
+
+def remove_duplicates(apps, schema_editor):
+    """Удаление дубликатов перед добавлением уникальных ограничений."""
+
+    Favorite = apps.get_model('recipes', 'Favorite')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    Tags = apps.get_model('recipes', 'Tags')
+    delete_duplicates(Favorite, ('user', 'recipe'))
+    merge_ingredient_duplicates(RecipeIngredient)
+    Recipe.objects.update(favorites_count=Coalesce(
+        Subquery(
+            Favorite.objects.filter(
+                recipe=OuterRef('pk')
+            ).order_by().values('recipe').annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        Value(0)
+    ))
+
+    duplicates = Tags.objects.order_by().values('slug').annotate(
+        keep_id=Min('id'), total=Count('id')
+    ).filter(total__gt=1)
+    for duplicate in duplicates:
+        tags = Tags.objects.filter(slug=duplicate['slug']).exclude(
+            id=duplicate['keep_id']
+        )
+        for tag in tags:
+            tag.slug = f'{tag.slug}-{tag.id}'
+            tag.save(update_fields=('slug',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='tags',
+            name='slug',
+            field=models.CharField(max_length=200, unique=True, validators=[django.core.validators.RegexValidator(message='В слаге содержится недопустимый символ', regex='^[-a-zA-Z0-9_]+$')]),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date', '-id'], name='recipe_pub_date_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='favorite',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_user_recipe_favorite'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeingredient',
+            constraint=models.UniqueConstraint(fields=('recipe', 'ingredient'), name='unique_recipe_ingredient'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.3 on 2026-10-18 18:13
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(help_text='Загрузите изображение', storage=recipes.storage.ContentHashStorage(), upload_to='recipes/images/', verbose_name='Изображения'),
+        ),
+    ]
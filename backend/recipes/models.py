@@ -2,10 +2,12 @@ from colorfield.fields import ColorField
 
 from django.core.validators import (RegexValidator, MinValueValidator,
                                     MaxValueValidator)
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from api.constants import THIRD_CONSTANT
-from users.models import User
+from recipes.storage import ContentHashStorage
+from users.models import MaintainedFieldsMixin, User
 
 
 class Tags(models.Model):
@@ -24,6 +26,7 @@ class Tags(models.Model):
     )
     slug = models.CharField(
         max_length=THIRD_CONSTANT,
+        unique=True,
         validators=(
             RegexValidator(
                 regex=r'^[-a-zA-Z0-9_]+$',
@@ -57,12 +60,18 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='unique_ingredient_name_unit'
+            ),
+        )
 
     def __str__(self):
         return f'{self.name}'
 
 
-class Recipe(models.Model):
+class Recipe(MaintainedFieldsMixin, models.Model):
     author = models.ForeignKey(
         User,
         blank=False,
@@ -84,6 +93,7 @@ class Recipe(models.Model):
     image = models.ImageField(
         null=False,
         upload_to='recipes/images/',
+        storage=ContentHashStorage(),
         verbose_name='Изображения',
         help_text='Загрузите изображение')
     ingredients = models.ManyToManyField(
@@ -137,6 +147,37 @@ class Recipe(models.Model):
         verbose_name='Список покупок',
         help_text='Рецепты, добавленные в список покупок'
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном'
+    )
+    shopping_lists_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В списках покупок'
+    )
+    ingredients_count = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество ингредиентов'
+    )
+    image_variants_source = models.CharField(
+        max_length=100,
+        blank=True,
+        editable=False,
+        verbose_name='Изображение с готовыми вариантами'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор'
+    )
+
+    maintained_fields = (
+        'favorites_count', 'shopping_lists_count', 'ingredients_count',
+        'search_vector', 'image_variants_source'
+    )
 
     def __str__(self):
         return self.name
@@ -145,6 +186,16 @@ class Recipe(models.Model):
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_pub_date_idx'
+            ),
+        )
 
 
 class RecipeIngredient(models.Model):
@@ -166,6 +217,18 @@ class RecipeIngredient(models.Model):
 
     class Meta:
         ordering = ('id',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'ingredient'),
+                name='unique_recipe_ingredient'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('ingredient', 'recipe'),
+                name='ingredient_recipe_idx'
+            ),
+        )
 
     def __str__(self):
         return (
@@ -199,6 +262,12 @@ class Favorite(FavoriteAndShoppingAbstarctModel):
         verbose_name = 'Избранное'
         verbose_name_plural = 'Избранные'
         ordering = ('id',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_user_recipe_favorite'
+            ),
+        )
 
     def __str__(self):
         return f"Пользователь {self.user} добавил {self.recipe} в избранное"
@@ -219,3 +288,50 @@ class ShoppingList(FavoriteAndShoppingAbstarctModel):
 
     def __str__(self):
         return f'{self.user} добавил "{self.recipe}" в список покупок'
+
+
+class FeedEntry(models.Model):
+    """Запись ленты подписок: рецепт автора, на которого подписан user."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пользователь'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField(verbose_name='Время публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_entry_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='feed_entry_user_author_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
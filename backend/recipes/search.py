@@ -0,0 +1,22 @@
+from django.contrib.postgres.search import SearchVector
+from django.db import connections
+
+from api.constants import SEARCH_CONFIG
+
+SEARCH_FIELDS = ('name', 'text')
+
+
+def get_search_vector():
+    """Поисковый вектор рецепта: совпадения в названии весят больше."""
+
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(queryset):
+    """Пересчет поискового вектора одним UPDATE (только PostgreSQL)."""
+
+    if connections[queryset.db].vendor == 'postgresql':
+        queryset.update(search_vector=get_search_vector())
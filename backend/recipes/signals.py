@@ -0,0 +1,59 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.counters import COUNTED_RELATIONS, change_counter
+from recipes.feed import backfill_feed, fan_out_recipe, remove_from_feed
+from recipes.images import schedule_variants
+from recipes.models import Favorite, Recipe, RecipeIngredient, ShoppingList
+from recipes.search import SEARCH_FIELDS, update_search_vector
+from users.models import Follow
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Follow)
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingList)
+@receiver(post_save, sender=RecipeIngredient)
+def increment_counter(sender, instance, created, **kwargs):
+    if created:
+        model, field, counter = COUNTED_RELATIONS[sender]
+        change_counter(model, getattr(instance, field), counter, 1)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Follow)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingList)
+@receiver(post_delete, sender=RecipeIngredient)
+def decrement_counter(sender, instance, **kwargs):
+    model, field, counter = COUNTED_RELATIONS[sender]
+    change_counter(model, getattr(instance, field), counter, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def create_image_variants(instance, **kwargs):
+    if instance.image:
+        schedule_variants(instance.image.name)
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_search_vector(instance, update_fields, **kwargs):
+    if update_fields is None or set(update_fields) & set(SEARCH_FIELDS):
+        update_search_vector(Recipe.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Recipe)
+def add_to_feeds(instance, created, **kwargs):
+    if created:
+        fan_out_recipe(instance)
+
+
+@receiver(post_save, sender=Follow)
+def fill_feed(instance, created, **kwargs):
+    if created:
+        backfill_feed(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def clear_feed(instance, **kwargs):
+    remove_from_feed(instance)
@@ -13,8 +13,8 @@ class UserAdmin(UserAdmin):
 
     list_display = (
         'id', 'username', 'email', 'first_name', 'last_name',
-        'get_recipes_count', 'get_followers_count')
-    readonly_fields = ('get_recipes_count', 'get_followers_count')
+        'recipes_count', 'followers_count')
+    readonly_fields = ('recipes_count', 'followers_count')
     list_display_links = ('username', 'email')
     search_fields = ('username', 'email')
     list_filter = ('username', 'email')
@@ -28,5 +28,8 @@ class FollowAdmin(admin.ModelAdmin):
 
     list_display = ('author', 'follower')
     list_display_links = ('author', 'follower')
+    list_select_related = ('author', 'follower')
+    autocomplete_fields = ('author', 'follower')
+    search_fields = ('author__username', 'follower__username')
     list_filter = ('author', 'follower')
     ordering = ('author',)
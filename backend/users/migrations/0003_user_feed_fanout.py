@@ -0,0 +1,29 @@
+# Generated by Django 3.2.3 on 2026-10-18 18:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_feed_fanout(apps, schema_editor):
+    """Авторы, рецепты которых не были разложены по лентам."""
+
+    User = apps.get_model('users', 'User')
+    User.objects.filter(
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).update(feed_fanout=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='feed_fanout',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Рецепты раскладываются по лентам подписчиков'),
+        ),
+        migrations.RunPython(fill_feed_fanout, migrations.RunPython.noop),
+    ]
@@ -6,7 +6,29 @@ from api.constants import (SECOND_CONSTANT, FIRST_CONSTANT)
 from api.validators import validate_username
 
 
-class User(AbstractUser):
+class MaintainedFieldsMixin:
+    """
+    Поля из maintained_fields меняются только атомарными UPDATE:
+    обычное сохранение существующего объекта их не перезаписывает
+    значениями, прочитанными при загрузке.
+    """
+
+    maintained_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (not args and not self._state.adding
+                and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            skipped = set(self.maintained_fields) | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skipped
+                and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+class User(MaintainedFieldsMixin, AbstractUser):
 
     email = models.EmailField(
         max_length=SECOND_CONSTANT,
@@ -44,19 +66,27 @@ class User(AbstractUser):
         help_text='Введите фамилию'
 
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписчиков'
+    )
+    feed_fanout = models.BooleanField(
+        default=True,
+        editable=False,
+        verbose_name='Рецепты раскладываются по лентам подписчиков'
+    )
+
+    maintained_fields = ('recipes_count', 'followers_count', 'feed_fanout')
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name', 'password']
 
-    def get_recipes_count(self):
-        return self.recipes.count()
-
-    def get_followers_count(self):
-        return self.author.count()
-
-    get_recipes_count.short_description = 'Количество рецептов'
-    get_followers_count.short_description = 'Количество подписчиков'
-
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'